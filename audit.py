@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from config import AUDIT_ENABLED, AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_OVERFLOW
+from database import async_session_maker
+from models.audit_events import AuditEvent
+
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop", "block")
+
+
+def client_ip(request) -> str | None:
+    return request.client.host if request.client else None
+
+
+class AuditLog:
+    """
+    Журнал событий аутентификации и авторизации. Обработчики кладут события
+    в ограниченную очередь в памяти и не ждут базы; фоновая задача пишет их
+    многострочными INSERT пачками по batch_size или раз в flush_interval секунд.
+    При остановке очередь дописывается до конца.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float,
+                 overflow: str = "drop", enabled: bool = True):
+        if overflow not in OVERFLOW_POLICIES:
+            raise RuntimeError(f"Unknown audit overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.enabled = enabled
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_size)
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_flushes = 0
+        self.lost = 0
+
+    async def emit(self, event: str, user_id: int | None = None, subject: str | None = None,
+                   ip: str | None = None, detail: str | None = None):
+        """
+        Ставит событие в очередь. Время события фиксируется здесь, а не при записи.
+        """
+        if not self.enabled:
+            return
+        record = {"created_at": datetime.now(timezone.utc), "event": event, "user_id": user_id,
+                  "subject": subject, "ip": ip, "detail": detail}
+        self.emitted += 1
+        if self.overflow == "block":
+            await self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Останавливает фоновую задачу после записи всех событий из очереди.
+        """
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+            elif self._stopping.is_set():
+                return
+
+    async def _collect(self) -> list[dict]:
+        # Пачка закрывается по размеру или по истечении flush_interval с начала сбора
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch: list[dict] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._stopping.is_set():
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list[dict]):
+        # При ошибке пачка повторяется с нарастающей паузой; тем временем события копятся в очереди
+        delay = self.flush_interval
+        while True:
+            try:
+                async with async_session_maker() as db:
+                    await db.execute(insert(AuditEvent), batch)
+                    await db.commit()
+            except Exception:
+                self.failed_flushes += 1
+                logger.exception("Failed to write %s audit events", len(batch))
+                if self._stopping.is_set():
+                    self.lost += len(batch)
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            self.written += len(batch)
+            self.batches += 1
+            return
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "overflow": self.overflow,
+            "queued": self._queue.qsize(),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_flushes": self.failed_flushes,
+            "lost": self.lost,
+        }
+
+
+audit_log = AuditLog(
+    max_size=AUDIT_QUEUE_SIZE,
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL,
+    overflow=AUDIT_OVERFLOW,
+    enabled=AUDIT_ENABLED,
+)
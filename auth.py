@@ -1,25 +1,89 @@
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import jwt
-from fastapi import Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy import select
-from models.permissions import Permission
-from models.role_permissions import RolePermission
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from models.users import User as UserModel
 
-from config import SECRET_KEY, ALGORITHM
-from db_depends import get_async_db
+from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from config import JWT_KEYS_DIR, JWT_ACTIVE_KID
+from config import HASH_POOL_KIND, HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING, STATELESS_TOKENS
+from config import BCRYPT_ROUNDS, BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS, BCRYPT_REHASH
+from config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_TTL
+from cache import LRUCache, VerifiedTokenCache
+from db_depends import get_async_db, get_read_db
+from hashing import HashingPool, calibrate_bcrypt_rounds
+from keys import KeyRing
+from rbac import grants_match, permission_matrix
+from invalidation import invalidation_channel
+from revocation import token_denylist
+from timing import phase
+from audit import audit_log, client_ip
 
 
 # Создаём контекст для хеширования с использованием bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-REFRESH_TOKEN_EXPIRE_DAYS = 7
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
+# Ключи подписи и проверки JWT (HS256 с SECRET_KEY или RS256/ES256/EdDSA с kid)
+key_ring = KeyRing(ALGORITHM, secret=SECRET_KEY, keys_dir=JWT_KEYS_DIR, active_kid=JWT_ACTIVE_KID or None)
+
+# Пул, в котором выполняется bcrypt, чтобы не блокировать event loop
+hashing_pool = HashingPool(kind=HASH_POOL_KIND, workers=HASH_POOL_WORKERS, max_pending=HASH_POOL_MAX_PENDING)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Компактное описание аутентифицированного пользователя для проверок доступа.
+    Создаётся один раз на запрос и разделяется всеми auth-зависимостями.
+    permissions — развёрнутые права роли (с наследованием и шаблонами "*"),
+    если они известны на момент создания.
+    """
+    id: int
+    role_id: int
+    role_name: str | None
+    is_active: bool
+    permissions: frozenset[tuple[str, str]] | None = None
+
+    def has_permission(self, resource: str, action: str) -> bool:
+        if self.permissions is not None:
+            return grants_match(self.permissions, resource, action)
+        return permission_matrix.has_permission(self.role_id, resource, action)
+
+
+# Кэш Principal по id пользователя; сбрасывается через канал инвалидации
+principal_cache = LRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+invalidation_channel.subscribe("principal", lambda key: principal_cache.pop(int(key)))
+# Закэшированные права ролей устаревают вместе со снимком RBAC
+permission_matrix.on_rebuild(principal_cache.clear)
+
+
+async def _resync_principals():
+    # Пока канал был недоступен, инвалидации пользователей и ролей могли потеряться
+    principal_cache.clear()
+    permission_matrix.invalidate()
+
+
+invalidation_channel.on_reconnect(_resync_principals)
+
+# Кэш проверенных токенов: повторные запросы с тем же JWT не проверяют подпись заново
+token_cache = VerifiedTokenCache(maxsize=TOKEN_CACHE_SIZE, max_ttl=TOKEN_CACHE_MAX_TTL)
+
+
+async def invalidate_principal(user_id: int):
+    """
+    Удаляет Principal пользователя из кэшей всех воркеров.
+    Вызывается после commit изменений пользователя.
+    """
+    await invalidation_channel.publish("principal", user_id)
+
 
 def hash_password(password: str) -> str:
     """
@@ -35,14 +99,86 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """
+    Хеширует пароль в пуле воркеров, не блокируя event loop.
+    """
+    with phase("bcrypt"):
+        return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет пароль в пуле воркеров, не блокируя event loop.
+    """
+    with phase("bcrypt"):
+        return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и, если хеш не соответствует текущей политике bcrypt,
+    возвращает новый хеш с текущим числом раундов.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    verify_and_update_password в пуле воркеров.
+    """
+    with phase("bcrypt"):
+        return await hashing_pool.run(verify_and_update_password, plain_password, hashed_password)
+
+
+# Текущая политика bcrypt для /internal/stats
+bcrypt_policy = {"rounds": None, "calibrated": False, "rehash": BCRYPT_REHASH, "rehashed": 0}
+
+
+def configure_bcrypt(rounds: int, rehash: str = BCRYPT_REHASH):
+    """
+    Задаёт число раундов для новых хешей и границы, за которыми
+    needs_update считает сохранённый хеш устаревшим: "upgrade" — только нижнюю,
+    "exact" — обе, "off" — никаких. bcrypt__rounds не подходит: он задаёт точное
+    значение, и needs_update срабатывает на любой хеш с другим числом раундов.
+    Вызывается и в основном процессе, и как initializer процессов пула.
+    """
+    settings = {"bcrypt__default_rounds": rounds}
+    if rehash in ("upgrade", "exact"):
+        settings["bcrypt__min_rounds"] = rounds
+    if rehash == "exact":
+        settings["bcrypt__max_rounds"] = rounds
+    # load заменяет настройки целиком, чтобы границы прежней политики не сохранялись
+    pwd_context.load({"schemes": ["bcrypt"], "deprecated": "auto", **settings})
+    bcrypt_policy["rounds"] = rounds
+    bcrypt_policy["rehash"] = rehash
+
+
+def setup_bcrypt_policy():
+    """
+    Применяет BCRYPT_ROUNDS или, если задан BCRYPT_TARGET_MS, калибрует раунды
+    под целевую задержку на текущем железе. Вызывается при старте приложения.
+    """
+    if BCRYPT_TARGET_MS > 0:
+        rounds = calibrate_bcrypt_rounds(BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS)
+        bcrypt_policy["calibrated"] = True
+    elif BCRYPT_ROUNDS > 0:
+        rounds = BCRYPT_ROUNDS
+    else:
+        return
+    configure_bcrypt(rounds, BCRYPT_REHASH)
+    hashing_pool.set_initializer(configure_bcrypt, rounds, BCRYPT_REHASH)
+
+
 def create_access_token(data: dict):
     """
-    Создаёт JWT с payload (sub, role, id, exp).
+    Создаёт JWT с payload (sub, role, id, exp) и уникальным jti для отзыва.
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex})
+    return key_ring.encode(to_encode)
 
 
 def create_refresh_token(data: dict):          # New
@@ -50,15 +186,48 @@ def create_refresh_token(data: dict):          # New
     Создаёт рефреш-токен с длительным сроком действия.
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex})
+    return key_ring.encode(to_encode)
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme),
-                           db: AsyncSession = Depends(get_async_db)):
+def _decode_jwt(token: str) -> dict:
+    return key_ring.decode(token)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Проверяет подпись и срок действия JWT и возвращает payload.
+    Результат кэшируется до exp; возвращаемый словарь нельзя изменять.
+    """
+    return token_cache.decode(token, _decode_jwt)
+
+
+async def access_token_claims(user: UserModel, db: AsyncSession) -> dict:
+    """
+    Формирует payload access-токена. В stateless-режиме добавляет роль,
+    is_active и текущую эпоху пользователей.
+    """
+    claims = {"sub": str(user.id)}
+    if STATELESS_TOKENS:
+        await permission_matrix.ensure_fresh(db)
+        claims.update({
+            "role_id": user.role_id,
+            "role": permission_matrix.role_name(user.role_id),
+            "active": user.is_active,
+            "epoch": permission_matrix.user_epoch,
+        })
+    return claims
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme),
+                                db: AsyncSession = Depends(get_async_db),
+                                read_db: AsyncSession = Depends(get_read_db)) -> Principal:
     """
-    Проверяет JWT и возвращает пользователя из базы.
+    Проверяет JWT и возвращает Principal. Stateless-токен с актуальной эпохой
+    авторизуется без запроса к базе, иначе пользователь читается из базы
+    (с реплики, если она настроена). Версия RBAC сверяется с основной базой.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,61 +235,129 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        with phase("jwt"):
+            payload = decode_token(token)
+        user_id = int(payload["sub"])
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.PyJWTError:
+    except (jwt.PyJWTError, KeyError, ValueError):
         raise credentials_exception
 
-    user = await db.get(UserModel, user_id)
+    # Проверка отзыва выполняется всегда, в том числе для токенов из кэша
+    if token_denylist.is_revoked(payload):
+        raise credentials_exception
+
+    await permission_matrix.ensure_fresh(db)
+    if STATELESS_TOKENS and payload.get("epoch") == permission_matrix.user_epoch:
+        if not payload.get("active"):
+            raise credentials_exception
+        return Principal(id=user_id, role_id=payload["role_id"], role_name=payload["role"], is_active=True)
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    # Права роли берутся из снимка: в нём уже развёрнуты наследование и шаблоны
+    result = await read_db.execute(
+        select(UserModel)
+        .options(joinedload(UserModel.role))
+        .where(UserModel.id == user_id)
+    )
+    user = result.scalar_one_or_none()
     if not user or not user.is_active:
         raise credentials_exception
+    if user.tokens_valid_after and payload.get("iat", 0) <= user.tokens_valid_after.timestamp():
+        raise credentials_exception
 
+    principal = Principal(
+        id=user.id,
+        role_id=user.role_id,
+        role_name=user.role.name,
+        is_active=user.is_active,
+        permissions=permission_matrix.permissions_for(user.role_id),
+    )
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+async def get_current_user(principal: Principal = Depends(get_current_principal),
+                           db: AsyncSession = Depends(get_async_db)):
+    """
+    Возвращает ORM-объект пользователя для эндпоинтов, которые его изменяют.
+    """
+    user = await db.get(UserModel, principal.id)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
-async def get_current_client(current_user: UserModel = Depends(get_current_user)):
+async def get_current_client(principal: Principal = Depends(get_current_principal)):
     """
     Проверяет, что пользователь имеет роль 'client'.
     """
-    if current_user.role.name != "client":
+    if principal.role_name != "client":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only clients can perform this action")
-    return current_user
+    return principal
 
 
-async def get_current_admin(current_user: UserModel = Depends(get_current_user)):
+async def get_current_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
     """
     Проверяет, что пользователь имеет роль 'admin'.
     """
-    if current_user.role.name != "admin":
+    if principal.role_name != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can perform this action")
-    return current_user
+    return principal
 
 
 def check_permission(resource: str, action: str):
-    async def checker(
-        user: UserModel = Depends(get_current_user),
-        db: AsyncSession = Depends(get_async_db),
-    ):
-        stmt = (
-            select(Permission.id)
-            .join(RolePermission)
-            .where(
-                RolePermission.role_id == user.role_id,
-                Permission.resource == resource,
-                Permission.action == action
-            )
-        )
-        result = await db.execute(stmt)
-        if not result.first():
+    async def checker(request: Request, user: Principal = Depends(get_current_principal)):
+        # Права берутся из Principal или локального снимка, без запроса к базе
+        with phase("permission"):
+            allowed = user.has_permission(resource, action)
+        if not allowed:
+            await audit_log.emit("permission_denied", user_id=user.id, subject=f"{resource}:{action}",
+                                 ip=client_ip(request), detail=request.url.path)
             raise HTTPException(status_code=403, detail=f"Access denied to {resource}:{action}")
         return True
 
-    return checker
\ No newline at end of file
+    return checker
+
+
+def parse_permission(pair: str) -> tuple[str, str]:
+    """
+    Разбирает строку вида "resource:action".
+    """
+    resource, sep, action = pair.partition(":")
+    if not sep or not resource or not action:
+        raise ValueError(f"Invalid permission {pair!r}, expected 'resource:action'")
+    return resource, action
+
+
+def check_permissions(pairs: list[str], mode: str = "all"):
+    """
+    Проверяет сразу несколько прав одним вызовом: mode="all" требует все,
+    mode="any" — хотя бы одно. Возвращает словарь {"resource:action": bool}.
+    """
+    if mode not in ("all", "any"):
+        raise ValueError(f"Unknown mode: {mode}")
+    parsed = [(pair, parse_permission(pair)) for pair in pairs]
+
+    async def checker(request: Request, user: Principal = Depends(get_current_principal)) -> dict[str, bool]:
+        verdicts = {pair: user.has_permission(resource, action) for pair, (resource, action) in parsed}
+        allowed = all(verdicts.values()) if mode == "all" else any(verdicts.values())
+        if not allowed:
+            denied = ", ".join(pair for pair, granted in verdicts.items() if not granted)
+            await audit_log.emit("permission_denied", user_id=user.id, subject=denied,
+                                 ip=client_ip(request), detail=request.url.path)
+            raise HTTPException(status_code=403, detail=f"Access denied to {denied}")
+        return verdicts
+
+    return checker
@@ -0,0 +1,50 @@
+"""
+Сравнение двух JSON-отчётов benchmarks/run.py.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# Метрики, для которых рост — это регрессия; для остальных регрессия — падение
+LOWER_IS_BETTER = ("_ms", "_us")
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимое ухудшение, %%")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(args.current, encoding="utf-8") as f:
+        current = flatten(json.load(f)["results"])
+
+    regressions = 0
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name], current[name]
+        if not old or name.endswith((".requests", ".errors")):
+            continue
+        change = (new - old) / old * 100
+        worse = change > args.threshold if name.endswith(LOWER_IS_BETTER) else change < -args.threshold
+        regressions += worse
+        print(f"{'REGRESSION ' if worse else '           '}{name:40} {old:>12} -> {new:>12} ({change:+.1f}%)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import random
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from auth import hash_password
+from database import Base
+from models.permissions import Permission
+from models.rbac_state import RbacState
+from models.role_permissions import RolePermission
+from models.roles import Role
+from models.users import User
+
+
+BENCH_PASSWORD = "BenchPass123"
+ACTIONS = ["read", "create", "update", "delete"]
+
+
+async def generate(engine: AsyncEngine, users: int, roles: int, resources: int,
+                   seed: int = 42, chunk_size: int = 5000) -> dict:
+    """
+    Пересоздаёт схему и заполняет её синтетическими ролями, правами и пользователями.
+    Роль 1 — admin со всеми правами, роль 2 — client с items:read,
+    остальные роли получают случайные подмножества прав.
+    Все пользователи имеют пароль BENCH_PASSWORD (хеш считается один раз).
+    """
+    rng = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        role_names = ["admin", "client"] + [f"role_{i}" for i in range(3, roles + 1)]
+        await conn.execute(insert(Role), [{"id": i, "name": name} for i, name in enumerate(role_names, 1)])
+
+        resource_names = ["items"] + [f"resource_{i}" for i in range(1, resources)]
+        perms = [(resource, action) for resource in resource_names for action in ACTIONS]
+        await conn.execute(insert(Permission), [
+            {"id": i, "resource": resource, "action": action} for i, (resource, action) in enumerate(perms, 1)
+        ])
+
+        grants = [(1, perm_id) for perm_id in range(1, len(perms) + 1)]
+        grants.append((2, perms.index(("items", "read")) + 1))
+        for role_id in range(3, len(role_names) + 1):
+            for perm_id in rng.sample(range(1, len(perms) + 1), k=max(1, len(perms) // 4)):
+                grants.append((role_id, perm_id))
+        await conn.execute(insert(RolePermission), [
+            {"role_id": role_id, "permission_id": perm_id} for role_id, perm_id in grants
+        ])
+        await conn.execute(insert(RbacState), [{"id": 1, "version": 1, "user_epoch": 0}])
+
+        hashed = hash_password(BENCH_PASSWORD)
+        for start in range(0, users, chunk_size):
+            await conn.execute(insert(User), [
+                {
+                    "id": i,
+                    "name": f"User {i}",
+                    "email": f"user{i}@bench.example.com",
+                    "hashed_password": hashed,
+                    "is_active": True,
+                    # Каждый второй пользователь — client, остальные распределены по ролям
+                    "role_id": 2 if i % 2 else rng.randint(1, len(role_names)),
+                }
+                for i in range(start + 1, min(start + chunk_size, users) + 1)
+            ])
+
+        if conn.dialect.name == "postgresql":
+            # id заданы явно, поэтому последовательности нужно сдвинуть вручную
+            for table in ("roles", "permissions", "role_permissions", "users"):
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                ))
+
+    return {"users": users, "roles": len(role_names), "permissions": len(perms), "grants": len(grants)}
+
+
+def client_emails(users: int, count: int) -> list[str]:
+    """
+    Email пользователей с ролью client (нечётные id).
+    """
+    return [f"user{i}@bench.example.com" for i in range(1, users + 1, 2)][:count]
@@ -0,0 +1,179 @@
+"""
+Нагрузочные и микро-бенчмарки горячих путей аутентификации.
+
+Приложение запускается в процессе через ASGI-транспорт httpx, база — локальный
+Postgres или SQLite-файл (aiosqlite). Результаты сохраняются в JSON для сравнения
+между запусками (см. benchmarks/compare.py).
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.run --users 10000 --requests 2000 --concurrency 50 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench.db"),
+                        help="База для бенчмарка (будет очищена!)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--resources", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000, help="Запросов на сценарий")
+    parser.add_argument("--login-requests", type=int, default=200, help="Запросов для /users/token (bcrypt)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--token-users", type=int, default=50, help="Сколько пользователей логинится для токенов")
+    parser.add_argument("--micro-iterations", type=int, default=20000)
+    parser.add_argument("--scenarios", default="login,refresh,authenticated,permission,micro")
+    parser.add_argument("--output", default=None, help="Путь к JSON с результатами")
+    return parser.parse_args()
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float | None:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def drive(total: int, concurrency: int, make_request) -> dict:
+    """
+    Выполняет total запросов с заданной конкурентностью; make_request(i) возвращает response.
+    """
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def micro(iterations: int) -> dict:
+    from auth import create_access_token, decode_token, hash_password, key_ring, verify_password
+
+    token = create_access_token({"sub": "1"})
+    results = {}
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        key_ring.decode(token)
+    results["jwt_decode_us"] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+    decode_token(token)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode_token(token)
+    results["decode_token_cached_us"] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+    hashed = hash_password("BenchPass123")
+    rounds = 10
+    started = time.perf_counter()
+    for _ in range(rounds):
+        verify_password("BenchPass123", hashed)
+    results["bcrypt_verify_ms"] = round((time.perf_counter() - started) / rounds * 1000, 3)
+    return results
+
+
+async def main(args) -> dict:
+    import httpx
+
+    from benchmarks.dataset import BENCH_PASSWORD, client_emails, generate
+    from database import async_engine
+    from main import app
+
+    dataset = await generate(async_engine, users=args.users, roles=args.roles, resources=args.resources)
+    scenarios = set(args.scenarios.split(","))
+    results: dict = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        emails = client_emails(args.users, args.token_users)
+
+        async def login(i):
+            return await client.post("/users/token", data={"username": emails[i % len(emails)],
+                                                           "password": BENCH_PASSWORD})
+
+        # Токены для остальных сценариев
+        tokens = []
+        for i in range(len(emails)):
+            tokens.append((await login(i)).json())
+
+        if "login" in scenarios:
+            results["login"] = await drive(args.login_requests, args.concurrency, login)
+
+        if "refresh" in scenarios:
+            async def refresh(i):
+                return await client.post("/users/refresh-token",
+                                         params={"refresh_token": tokens[i % len(tokens)]["refresh_token"]})
+            results["refresh"] = await drive(args.requests, args.concurrency, refresh)
+
+        if "authenticated" in scenarios:
+            async def authenticated(i):
+                token = tokens[i % len(tokens)]["access_token"]
+                return await client.get("/users/me/permissions", headers={"Authorization": f"Bearer {token}"})
+            results["authenticated"] = await drive(args.requests, args.concurrency, authenticated)
+
+        if "permission" in scenarios:
+            async def permission(i):
+                token = tokens[i % len(tokens)]["access_token"]
+                return await client.get("/mock/items", headers={"Authorization": f"Bearer {token}"})
+            results["permission"] = await drive(args.requests, args.concurrency, permission)
+
+    if "micro" in scenarios:
+        results["micro"] = micro(args.micro_iterations)
+
+    await async_engine.dispose()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": async_engine.dialect.name,
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "database_url")},
+        "dataset": dataset,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Окружение задаётся до импорта модулей приложения: движок создаётся при импорте
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+    # Сценарий логина намеренно бьёт по одним и тем же аккаунтам с одного адреса
+    os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+    report = asyncio.run(main(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,96 @@
+"""
+Микро-бенчмарк сериализации больших списков из ORM-объектов.
+
+Сравнивает путь response_model FastAPI (валидация Page[User] с from_attributes,
+включая EmailStr, dump в JSON-совместимые типы и json.dumps) с путём
+serialization.page_response (чтение атрибутов без валидации и orjson/json).
+База не нужна: пользователи создаются как несохранённые ORM-объекты.
+
+    python -m benchmarks.serialization --sizes 50,500,5000 --output serialization.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500,5000", help="Размеры страниц через запятую")
+    parser.add_argument("--iterations", type=int, default=0,
+                        help="Повторов на размер (по умолчанию около 200 000 элементов на замер)")
+    parser.add_argument("--output", default=None, help="Путь к JSON с результатами")
+    return parser.parse_args()
+
+
+def measure(func, iterations: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main(args) -> dict:
+    from fastapi.responses import JSONResponse
+    from pydantic import EmailStr, TypeAdapter
+
+    from models.users import User as UserModel
+    from schemas.admin import Page
+    from schemas.users import User as UserSchema
+    from serialization import JSON_BACKEND, page_response
+
+    class ValidatedUser(UserSchema):
+        # Схема ответа до оптимизации: email повторно проверяется как EmailStr
+        email: EmailStr
+
+    adapter = TypeAdapter(Page[ValidatedUser])
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        users = [
+            UserModel(id=i, name=f"User {i}", email=f"user{i}@example.com", is_active=True, role_id=2)
+            for i in range(1, size + 1)
+        ]
+        iterations = args.iterations or max(3, 200_000 // size)
+
+        def validated():
+            page = adapter.validate_python({"items": users, "next_cursor": size}, from_attributes=True)
+            return JSONResponse(adapter.dump_python(page, mode="json")).body
+
+        def fast():
+            return page_response(UserSchema, users, size).body
+
+        assert json.loads(validated()) == json.loads(fast())
+        validated_us = measure(validated, iterations)
+        fast_us = measure(fast, iterations)
+        results[f"users_{size}"] = {
+            "response_model_us": round(validated_us, 3),
+            "fast_path_us": round(fast_us, 3),
+            "per_item_saving_ns": round((validated_us - fast_us) / size * 1000, 1),
+            "speedup": round(validated_us / fast_us, 2),
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "json_backend": JSON_BACKEND,
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Модули приложения создают движок и ключи при импорте
+    os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench.db")
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+    report = main(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,185 @@
+import asyncio
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import bcrypt_policy, configure_bcrypt, hash_password
+from config import BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_WORKERS, BULK_IMPORT_MAX_ERRORS
+from database import dialect_insert
+from models.users import User as UserModel
+from rbac import permission_matrix
+from schemas.users import UserImport, ImportReport
+
+
+FORMATS = ("ndjson", "csv")
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Процессы получают ту же стоимость bcrypt, что выбрана при старте (см. setup_bcrypt_policy),
+        # иначе импортированные хеши перехешировались бы при первом входе
+        rounds = bcrypt_policy["rounds"]
+        initializer, initargs = (configure_bcrypt, (rounds, bcrypt_policy["rehash"])) if rounds else (None, ())
+        _executor = ProcessPoolExecutor(max_workers=BULK_IMPORT_WORKERS, initializer=initializer, initargs=initargs)
+    return _executor
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [hash_password(password) for password in passwords]
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Хеширует пачку паролей, распределяя её по процессам пула.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    step = max(1, -(-len(passwords) // BULK_IMPORT_WORKERS))
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(executor, _hash_many, passwords[i:i + step])
+        for i in range(0, len(passwords), step)
+    ))
+    return [hashed for part in parts for hashed in part]
+
+
+async def iter_lines(read: Callable[[int], Awaitable[bytes]], size: int = 64 * 1024) -> AsyncIterator[str]:
+    """
+    Построчно читает поток байтов, держа в памяти не больше одного блока.
+    """
+    buffer = b""
+    while chunk := await read(size):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def aiter_sync(lines: Iterable[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line.rstrip("\r\n")
+
+
+async def iter_records(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Разбирает NDJSON или CSV (с заголовком) и выдаёт (номер строки, запись, ошибка разбора).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+        else:
+            row = next(csv.reader([line]))
+            if header is None:
+                header = [column.strip() for column in row]
+                continue
+            if len(row) != len(header):
+                yield line_no, None, f"Expected {len(header)} columns, got {len(row)}"
+                continue
+            yield line_no, dict(zip(header, row)), None
+
+
+class UserImporter:
+    """
+    Потоковый импорт пользователей пачками: валидация строк, хеширование паролей
+    в пуле процессов и вставка одним INSERT ... ON CONFLICT (email) DO NOTHING на пачку.
+    Ошибки строк попадают в отчёт и не прерывают импорт.
+    """
+
+    def __init__(self, db: AsyncSession, chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+                 max_errors: int = BULK_IMPORT_MAX_ERRORS):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def _error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    async def run(self, lines: AsyncIterable[str], fmt: str) -> ImportReport:
+        await permission_matrix.ensure_fresh(self.db)
+        chunk: list[tuple[int, UserImport]] = []
+        async for line_no, record, error in iter_records(lines, fmt):
+            self.processed += 1
+            if error:
+                self._error(line_no, error)
+                continue
+            try:
+                user = UserImport.model_validate(record)
+            except ValidationError as exc:
+                self._error(line_no, "; ".join(
+                    f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+                ))
+                continue
+            if not permission_matrix.role_exists(user.role_id):
+                self._error(line_no, "Role does not exist")
+                continue
+            chunk.append((line_no, user))
+            if len(chunk) >= self.chunk_size:
+                await self._flush(chunk)
+                chunk = []
+        if chunk:
+            await self._flush(chunk)
+        return ImportReport(processed=self.processed, inserted=self.inserted,
+                            failed=self.failed, errors=self.errors)
+
+    async def _flush(self, chunk: list[tuple[int, UserImport]]):
+        # Повторы email внутри пачки отсекаются до вставки
+        seen: dict[str, int] = {}
+        unique = []
+        for line_no, user in chunk:
+            email = str(user.email)
+            if email in seen:
+                self._error(line_no, f"Duplicate email in file (first seen on line {seen[email]})")
+                continue
+            seen[email] = line_no
+            unique.append((line_no, user))
+        if not unique:
+            return
+
+        hashed = await hash_passwords([user.password for _, user in unique])
+        rows = [
+            {"name": user.name, "email": str(user.email), "hashed_password": hashed_password,
+             "role_id": user.role_id, "is_active": True}
+            for (_, user), hashed_password in zip(unique, hashed)
+        ]
+        stmt = (
+            dialect_insert(UserModel)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[UserModel.email])
+            .returning(UserModel.email)
+        )
+        inserted = set((await self.db.scalars(stmt)).all())
+        await self.db.commit()
+
+        self.inserted += len(inserted)
+        for line_no, user in unique:
+            if str(user.email) not in inserted:
+                self._error(line_no, "Email already registered")
@@ -0,0 +1,118 @@
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру кэш с вытеснением LRU и временем жизни записей.
+    Рассчитан на использование из одного event loop, поэтому без блокировок.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class VerifiedTokenCache:
+    """
+    Кэш уже проверенных JWT: ключ — SHA-256 токена, значение — payload до его exp.
+    Повторный запрос с тем же токеном обходится без проверки подписи и разбора claims.
+    Просроченный токен из кэша не отдаётся: он удаляется и проверяется заново,
+    что приводит к обычной ошибке истечения срока.
+    """
+
+    def __init__(self, maxsize: int, max_ttl: float):
+        self._cache = LRUCache(maxsize=maxsize, ttl=max_ttl)
+        self.max_ttl = max_ttl
+        self._decode_seconds = 0.0
+        self._hit_seconds = 0.0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def decode(self, token: str, decoder: Callable[[str], dict]) -> dict:
+        started = time.perf_counter()
+        key = self.key(token)
+        payload = self._cache.get(key)
+        if payload is not None:
+            if payload["exp"] > time.time():
+                self._hit_seconds += time.perf_counter() - started
+                return payload
+            self._cache.pop(key)
+
+        payload = decoder(token)
+        self._decode_seconds += time.perf_counter() - started
+        exp = payload.get("exp")
+        if exp is not None:
+            ttl = min(exp - time.time(), self.max_ttl)
+            if ttl > 0:
+                self._cache.set(key, payload, ttl=ttl)
+        return payload
+
+    def discard(self, token: str):
+        self._cache.pop(self.key(token))
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        # Оценка экономии CPU: средняя цена полной проверки против цены попадания в кэш
+        avg_decode = self._decode_seconds / stats["misses"] if stats["misses"] else None
+        avg_hit = self._hit_seconds / stats["hits"] if stats["hits"] else None
+        stats["avg_decode_us"] = round(avg_decode * 1e6, 2) if avg_decode is not None else None
+        stats["avg_hit_us"] = round(avg_hit * 1e6, 2) if avg_hit is not None else None
+        if avg_decode is not None and avg_hit is not None:
+            stats["saved_per_hit_us"] = round((avg_decode - avg_hit) * 1e6, 2)
+            stats["saved_total_ms"] = round((avg_decode - avg_hit) * stats["hits"] * 1e3, 3)
+        return stats
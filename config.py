@@ -4,4 +4,113 @@ from dotenv import load_dotenv
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
\ No newline at end of file
+# Алгоритм подписи JWT: HS256 (общий SECRET_KEY) или асимметричный (RS256, ES256, EdDSA)
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Для асимметричных алгоритмов: каталог с ключами <kid>.pem (закрытые) и <kid>.pub.pem
+# (только проверка), kid активного ключа подписи и время кэширования JWKS
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "keys")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", "300"))
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# Пул для bcrypt: "thread" или "process", число воркеров и лимит ожидающих задач
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "thread")
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "0")) or (os.cpu_count() or 1)
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", "64"))
+
+# Как часто (в секундах) локальный снимок ролей и прав сверяется с версией в базе
+RBAC_RECONCILE_SECONDS = float(os.getenv("RBAC_RECONCILE_SECONDS", "5"))
+
+# Stateless-режим: access-токен несёт роль, is_active и эпоху пользователей,
+# и запрос авторизуется без обращения к базе
+STATELESS_TOKENS = os.getenv("STATELESS_TOKENS", "false").lower() in ("1", "true", "yes")
+
+# Кэш Principal для get_current_user: размер, время жизни записи (секунды)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+# Канал инвалидации кэшей между воркерами: "local" или "postgres" (LISTEN/NOTIFY)
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "local")
+# Как часто (в секундах) проверяется соединение LISTEN канала postgres
+INVALIDATION_HEALTH_SECONDS = float(os.getenv("INVALIDATION_HEALTH_SECONDS", "5"))
+
+# Кэш проверенных JWT: число записей и максимальное время жизни записи (секунды)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "50000"))
+TOKEN_CACHE_MAX_TTL = float(os.getenv("TOKEN_CACHE_MAX_TTL", "1800"))
+
+# Фильтр Блума для отозванных токенов: ожидаемое число записей и доля ложных срабатываний
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.01"))
+
+# Массовый импорт пользователей: размер пачки, число процессов для bcrypt, лимит ошибок в отчёте
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", "0")) or (os.cpu_count() or 1)
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+# Пул соединений с базой
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Размер кэша подготовленных выражений asyncpg (0 — отключить, например за pgbouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Метрики Prometheus на /metrics и заголовок Server-Timing с длительностью фаз запроса
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Ограничение попыток входа: "число/секунды" на email и на IP, backend "memory" или "postgres"
+LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+LOGIN_RATE_LIMIT_EMAIL = os.getenv("LOGIN_RATE_LIMIT_EMAIL", "5/60")
+LOGIN_RATE_LIMIT_IP = os.getenv("LOGIN_RATE_LIMIT_IP", "30/60")
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Стоимость bcrypt: фиксированное число раундов (0 — значение passlib по умолчанию)
+# или калибровка при старте под целевую задержку одной проверки в миллисекундах
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "0"))
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "0"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+# Перехеширование при входе: "upgrade" — только более слабые хеши, "exact" — любые отличные, "off"
+BCRYPT_REHASH = os.getenv("BCRYPT_REHASH", "upgrade")
+
+# Ключ для /internal/stats и /metrics (X-Internal-Key или Authorization: Bearer); пустое значение их отключает
+INTERNAL_KEY = os.getenv("INTERNAL_KEY", "")
+
+# Ключ, который шлюз передаёт в X-Introspection-Key; пустое значение отключает /oauth/introspect
+INTROSPECTION_KEY = os.getenv("INTROSPECTION_KEY", "")
+INTROSPECTION_MAX_TOKENS = int(os.getenv("INTROSPECTION_MAX_TOKENS", "1000"))
+
+# Прогрев при старте: сколько соединений пула открыть заранее
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", str(DB_POOL_SIZE)))
+
+# Журнал аудита: очередь событий в памяти и фоновая запись пачками.
+# При переполнении "drop" отбрасывает событие (со счётчиком), "block" ждёт места в очереди
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() in ("1", "true", "yes")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_OVERFLOW = os.getenv("AUDIT_OVERFLOW", "drop")
+
+# Чтение с реплики (DATABASE_REPLICA_URL): сколько секунд после собственной записи
+# запросы пользователя читают с основной базы, чтобы увидеть свои изменения
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_MAX_USERS = int(os.getenv("READ_YOUR_WRITES_MAX_USERS", "100000"))
+
+# Запуск нескольких воркеров через python serve.py: адрес, число воркеров (0 — по числу ядер)
+# и время на завершение текущих запросов при остановке и перезапуске
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0")) or (os.cpu_count() or 1)
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+# Общий лимит соединений всех воркеров с базой; 0 — у каждого воркера DB_POOL_SIZE и DB_MAX_OVERFLOW
+DB_POOL_BUDGET = int(os.getenv("DB_POOL_BUDGET", "0"))
+# Снимок ролей и прав, который супервизор публикует для воркеров: каталог задаётся
+# супервизором (пусто — снимок не используется), интервал сверки версии в секундах
+RBAC_SNAPSHOT_DIR = os.getenv("RBAC_SNAPSHOT_DIR", "")
+RBAC_SNAPSHOT_INTERVAL = float(os.getenv("RBAC_SNAPSHOT_INTERVAL", "1.0"))
@@ -1,7 +1,7 @@
 # create_tables.py
 import asyncio
 from database import async_engine, Base
-from models import users, roles, permissions, role_permissions  # импорт всех моделей, чтобы SQLAlchemy их увидел
+from models import users, roles, permissions, role_permissions, rbac_state, revoked_tokens, login_attempts, audit_events, role_inheritance  # импорт всех моделей, чтобы SQLAlchemy их увидел
 
 async def init_models():
     async with async_engine.begin() as conn:
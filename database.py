@@ -1,19 +1,170 @@
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
+from timing import TIMING_ENABLED, record
+from config import (DB_ECHO, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+                    DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE)
+
 # Строка подключения для PostgreSQl
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
+# Необязательная реплика только для чтения; без неё все запросы идут на основную базу
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+
+
+class PoolStats:
+    """
+    Метрики пула соединений: ожидание при выдаче соединения, таймауты и выдачи сверх pool_size.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._waits: deque[float] = deque(maxlen=1024)
+        self._wait_total = 0.0
+
+    def record_wait(self, seconds: float):
+        self._waits.append(seconds)
+        self._wait_total += seconds
+
+    def stats(self, pool) -> dict:
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float | None:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 3)
+
+        result = {
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_total_ms": round(self._wait_total * 1000, 3),
+            "wait_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            result.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return result
+
+
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул, измеряющий время ожидания свободного соединения.
+    """
+    stats = pool_stats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.record_wait(waited)
+            record("pool_wait", waited)
+
+
+class InstrumentedReplicaPool(InstrumentedPool):
+    stats = replica_pool_stats
+
+
+def engine_options(url: str, poolclass: type[InstrumentedPool] = InstrumentedPool) -> dict:
+    """
+    Параметры движка из окружения.
+    """
+    options = {
+        "echo": DB_ECHO,
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def instrument_pool(engine, stats: PoolStats = pool_stats):
+    """
+    Подписывает метрики пула на события SQLAlchemy.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+        if engine.pool.overflow() > 0:
+            stats.overflow_checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+    if TIMING_ENABLED:
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["query_started"] = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            record("sql", time.perf_counter() - conn.info.pop("query_started", time.perf_counter()))
 
 
 # Создаём Engine
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+async_engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_pool(async_engine)
+
+# Реплика для чтения, если задана
+replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(DATABASE_REPLICA_URL,
+                                         **engine_options(DATABASE_REPLICA_URL, InstrumentedReplicaPool))
+    instrument_pool(replica_engine, replica_pool_stats)
 
 # Настраиваем фабрику сеансов
 async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+# Сеансы только для чтения: реплика или, если её нет, основная база
+read_session_maker = async_sessionmaker(replica_engine or async_engine, expire_on_commit=False, class_=AsyncSession)
 
 
 class Base(DeclarativeBase):
     pass
+
+
+def dialect_insert(table):
+    """
+    Возвращает INSERT с поддержкой ON CONFLICT для диалекта текущего движка.
+    """
+    if async_engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
@@ -1,11 +1,145 @@
 from collections.abc import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession
-from database import async_session_maker
+import jwt
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from cache import LRUCache
+from config import READ_YOUR_WRITES_SECONDS, READ_YOUR_WRITES_MAX_USERS
+from database import async_session_maker, read_session_maker, replica_engine
+from invalidation import invalidation_channel
+from timing import phase
+
+
+class LazySession:
+    """
+    Заместитель AsyncSession: сессия создаётся при первом обращении к любому
+    её атрибуту, а соединение из пула берётся ещё позже — при первом запросе.
+    Запрос, который обслужен из памяти (снимок RBAC, кэши), не создаёт сессию вовсе.
+    """
+    __slots__ = ("_maker", "_session")
+
+    def __init__(self, maker: async_sessionmaker = async_session_maker):
+        self._maker = maker
+        self._session: AsyncSession | None = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._maker()
+            session_stats.created += 1
+        return getattr(self._session, name)
+
+
+class SessionStats:
+    """
+    Счётчики запросов с зависимостью get_async_db: сколько из них создали
+    сессию и сколько завершились, не взяв соединение из пула; для get_read_db —
+    сколько чтений ушло на реплику и сколько на основную базу.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.untouched = 0
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "sessions_created": self.created, "untouched": self.untouched,
+                "replica_reads": self.replica_reads, "primary_reads": self.primary_reads}
+
+
+session_stats = SessionStats()
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connection_used(session, transaction, connection):
+    # Вызывается, когда сессия получила соединение для новой транзакции
+    session.info["connection_used"] = True
+
+
+async def _close(lazy: LazySession):
+    session = lazy._session
+    if session is not None:
+        # Закрытие сессии возвращает соединение в пул
+        with phase("db_close"):
+            await session.close()
+
+
+class ReadYourWrites:
+    """
+    Пользователи, недавно изменившие свои данные: в течение window секунд их запросы
+    читают с основной базы, а не с реплики, которая может отставать.
+    Отметка рассылается другим воркерам через канал инвалидации.
+    """
+
+    def __init__(self, window: float, max_users: int):
+        self.window = window
+        self._recent = LRUCache(maxsize=max_users, ttl=window)
+        invalidation_channel.subscribe("rw", lambda key: self._recent.set(int(key), True))
+
+    async def mark(self, user_id: int):
+        self._recent.set(user_id, True)
+        await invalidation_channel.publish("rw", user_id)
+
+    def is_recent(self, user_id: int) -> bool:
+        return self._recent.get(user_id) is not None
+
+    def is_sticky(self, request: Request) -> bool:
+        # Пустая таблица — обычный случай, токен тогда не разбирается вовсе
+        if not len(self._recent):
+            return False
+        user_id = _token_subject(request)
+        return user_id is not None and self.is_recent(user_id)
+
+    def stats(self) -> dict:
+        return {"window": self.window, "users": len(self._recent)}
+
+
+def _token_subject(request: Request) -> int | None:
+    # Подпись не проверяется: sub нужен только для выбора базы, а не для авторизации
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return int(jwt.decode(token, options={"verify_signature": False})["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        return None
+
+
+read_your_writes = ReadYourWrites(window=READ_YOUR_WRITES_SECONDS, max_users=READ_YOUR_WRITES_MAX_USERS)
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Предоставляет асинхронную сессию SQLAlchemy для работы с базой данных PostgreSQL.
+    FastAPI кэширует зависимость в пределах запроса, поэтому все зависимости
+    запроса получают одну и ту же ленивую сессию.
+    """
+    lazy = LazySession()
+    session_stats.requests += 1
+    try:
+        yield lazy
+    finally:
+        session = lazy._session
+        if session is None or not session.info.get("connection_used"):
+            session_stats.untouched += 1
+        await _close(lazy)
+
+
+async def get_read_db(request: Request,
+                      primary: AsyncSession = Depends(get_async_db)) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия только для чтения. Без реплики или для пользователя с недавней записью
+    (см. ReadYourWrites) возвращает сессию основной базы этого же запроса.
     """
-    async with async_session_maker() as session:
-        yield session
\ No newline at end of file
+    if replica_engine is None or read_your_writes.is_sticky(request):
+        session_stats.primary_reads += 1
+        yield primary
+        return
+    session_stats.replica_reads += 1
+    lazy = LazySession(read_session_maker)
+    try:
+        yield lazy
+    finally:
+        await _close(lazy)
@@ -0,0 +1,119 @@
+import asyncio
+import statistics
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+
+class HashingPool:
+    """
+    Пул воркеров для bcrypt-операций.
+    Выносит хеширование и проверку паролей из event loop, ограничивает очередь
+    и отвечает 503 при её переполнении вместо того, чтобы копить задачи.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 1, max_pending: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._initializer = None
+        self._initargs: tuple = ()
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+        self._latencies: deque[float] = deque(maxlen=1024)
+
+    def _get_executor(self) -> Executor:
+        # Пул создаётся лениво, чтобы импорт модуля не порождал процессы
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self._initializer,
+                                                     initargs=self._initargs)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, func, *args):
+        """
+        Выполняет func(*args) в пуле. При переполнении очереди сразу отвечает 503.
+        """
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    def set_initializer(self, initializer, *initargs):
+        """
+        Задаёт функцию настройки процессов пула (например, число раундов bcrypt).
+        Уже созданный пул процессов пересоздаётся при следующем вызове.
+        """
+        self._initializer = initializer
+        self._initargs = initargs
+        if self.kind == "process":
+            self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """
+        Глубина очереди, число отказов и задержка (от постановки в очередь до результата).
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "queued": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int, samples: int = 3) -> int:
+    """
+    Подбирает наибольшее число раундов bcrypt, при котором одно хеширование
+    укладывается в target_ms. Каждый раунд удваивает стоимость, поэтому достаточно
+    замерить min_rounds и экстраполировать.
+    """
+    from passlib.hash import bcrypt
+
+    hasher = bcrypt.using(rounds=min_rounds)
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        durations.append((time.perf_counter() - started) * 1000)
+    base_ms = statistics.median(durations)
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
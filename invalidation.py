@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.engine import make_url
+
+from config import INVALIDATION_CHANNEL, INVALIDATION_HEALTH_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_NAME = "auth_invalidation"
+
+
+class InvalidationChannel:
+    """
+    Канал инвалидации локальных кэшей. Сообщение — пара (kind, key);
+    подписчики kind получают key строкой.
+    Базовая реализация доставляет сообщения только внутри процесса.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+        self._resync_handlers: list[Callable[[], Awaitable[None]]] = []
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, kind: str, handler: Callable[[str], None]):
+        self._handlers[kind].append(handler)
+
+    def on_reconnect(self, handler: Callable[[], Awaitable[None]]):
+        """
+        Регистрирует обработчик, который вызывается после восстановления канала:
+        сообщения за время разрыва потеряны, и кэш нужно сбросить или перечитать.
+        """
+        self._resync_handlers.append(handler)
+
+    async def _resync(self):
+        for handler in self._resync_handlers:
+            try:
+                await handler()
+            except Exception:
+                logger.exception("Invalidation resync handler %s failed", handler)
+
+    def _dispatch(self, message: str):
+        kind, _, key = message.partition(":")
+        for handler in self._handlers.get(kind, ()):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", message)
+
+    async def publish(self, kind: str, key):
+        self.published += 1
+        self._dispatch(f"{kind}:{key}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local", "published": self.published, "received": self.received}
+
+
+class PostgresNotifyChannel(InvalidationChannel):
+    """
+    Канал поверх Postgres LISTEN/NOTIFY: сообщения доходят до всех воркеров,
+    подключённых к той же базе. Локальные кэши сбрасываются сразу при публикации,
+    эхо собственного уведомления просто повторно удаляет уже удалённую запись.
+
+    Соединение LISTEN проверяется раз в health_interval секунд и при обрыве
+    переподключается с нарастающей паузой. После переподключения вызываются обработчики
+    on_reconnect, а сообщения, которые не удалось отправить, отправляются повторно.
+    """
+
+    def __init__(self, database_url: str, health_interval: float = 5.0, max_backoff: float = 30.0,
+                 max_unsent: int = 10000):
+        super().__init__()
+        # asyncpg ожидает DSN без имени драйвера SQLAlchemy
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.health_interval = health_interval
+        self.max_backoff = max_backoff
+        self._conn = None
+        # asyncpg не допускает параллельных операций на одном соединении
+        self._lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._unsent: deque[str] = deque(maxlen=max_unsent)
+        self.state = "disconnected"
+        self.reconnects = 0
+        self.publish_errors = 0
+
+    async def _connect(self):
+        import asyncpg
+
+        conn = await asyncpg.connect(self._dsn)
+        conn.add_termination_listener(self._on_terminate)
+        await conn.add_listener(CHANNEL_NAME, self._on_notify)
+        self._conn = conn
+        self.state = "connected"
+
+    async def start(self):
+        await self._connect()
+        self._lost.clear()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        self.state = "disconnected"
+
+    def _on_terminate(self, connection):
+        if connection is self._conn:
+            self._lost.set()
+
+    async def _healthy(self) -> bool:
+        if self._conn is None or self._conn.is_closed():
+            return False
+        try:
+            async with self._lock:
+                await asyncio.wait_for(self._conn.fetchval("SELECT 1"), self.health_interval)
+        except Exception:
+            return False
+        return True
+
+    async def _monitor(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.health_interval)
+            except TimeoutError:
+                if await self._healthy():
+                    continue
+            self._lost.clear()
+            await self._reconnect()
+
+    async def _reconnect(self):
+        self.state = "reconnecting"
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.terminate()
+        delay = 0.5
+        while True:
+            try:
+                await self._connect()
+                break
+            except Exception as exc:
+                logger.warning("Invalidation channel reconnect failed: %s; retrying in %.1fs", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        self.reconnects += 1
+        # Публикации во время переподключения лежат в _unsent и отправляются ниже
+        self._lost.clear()
+        logger.warning("Invalidation channel reconnected, resyncing local caches")
+        for _ in range(len(self._unsent)):
+            await self._notify(self._unsent.popleft())
+        await self._resync()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.received += 1
+        self._dispatch(payload)
+
+    async def _notify(self, message: str):
+        try:
+            if self._conn is None:
+                raise ConnectionError("LISTEN connection is not established")
+            async with self._lock:
+                await self._conn.execute("SELECT pg_notify($1, $2)", CHANNEL_NAME, message)
+        except Exception:
+            # Сообщение уйдёт после переподключения; запрос, который его публикует, не падает
+            self.publish_errors += 1
+            self._unsent.append(message)
+            self._lost.set()
+
+    async def publish(self, kind: str, key):
+        await super().publish(kind, key)
+        await self._notify(f"{kind}:{key}")
+
+    def stats(self) -> dict:
+        return {**super().stats(), "backend": "postgres", "state": self.state,
+                "connected": self._conn is not None and not self._conn.is_closed(),
+                "reconnects": self.reconnects, "publish_errors": self.publish_errors,
+                "unsent": len(self._unsent)}
+
+
+def create_channel(backend: str) -> InvalidationChannel:
+    if backend == "postgres":
+        from database import DATABASE_URL
+
+        return PostgresNotifyChannel(DATABASE_URL, health_interval=INVALIDATION_HEALTH_SECONDS)
+    if backend == "local":
+        return InvalidationChannel()
+    raise RuntimeError(f"Unknown invalidation channel: {backend}")
+
+
+invalidation_channel = create_channel(INVALIDATION_CHANNEL)
@@ -0,0 +1,84 @@
+import os
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+
+SYMMETRIC_ALGORITHMS = ("HS256", "HS384", "HS512")
+
+
+class KeyRing:
+    """
+    Ключи подписи и проверки JWT.
+    Для HS* используется общий SECRET_KEY. Для асимметричных алгоритмов ключи
+    читаются из каталога: <kid>.pem — закрытый ключ, <kid>.pub.pem — открытый ключ,
+    оставленный только для проверки после ротации. Токены подписываются активным
+    ключом с заголовком kid и проверяются любым известным ключом, поэтому после
+    ротации старые токены действительны до истечения срока, пока ключ лежит в каталоге.
+    """
+
+    def __init__(self, algorithm: str, secret: str | None = None, keys_dir: str | None = None,
+                 active_kid: str | None = None):
+        self.algorithm = algorithm
+        self.signing_key = None
+        self.active_kid: str | None = None
+        self.verification_keys: dict[str, object] = {}
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            if not secret:
+                raise RuntimeError("SECRET_KEY is not set")
+            self.signing_key = secret
+        else:
+            self._load_dir(keys_dir, active_kid)
+
+    def _load_dir(self, keys_dir: str | None, active_kid: str | None):
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+        if not keys_dir or not os.path.isdir(keys_dir):
+            raise RuntimeError(f"JWT_KEYS_DIR {keys_dir!r} does not exist")
+        private_keys = {}
+        for filename in sorted(os.listdir(keys_dir)):
+            path = os.path.join(keys_dir, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+            if filename.endswith(".pub.pem"):
+                self.verification_keys[filename.removesuffix(".pub.pem")] = load_pem_public_key(data)
+            elif filename.endswith(".pem"):
+                kid = filename.removesuffix(".pem")
+                private_keys[kid] = (load_pem_private_key(data, password=None), os.path.getmtime(path))
+                self.verification_keys[kid] = private_keys[kid][0].public_key()
+        if not private_keys:
+            raise RuntimeError(f"No private keys found in {keys_dir}")
+
+        # Активный ключ задаётся явно или выбирается самый новый файл
+        kid = active_kid or max(private_keys, key=lambda k: private_keys[k][1])
+        if kid not in private_keys:
+            raise RuntimeError(f"Active key {kid!r} not found in {keys_dir}")
+        self.active_kid = kid
+        self.signing_key = private_keys[kid][0]
+
+    def encode(self, payload: dict) -> str:
+        headers = {"kid": self.active_kid} if self.active_kid else None
+        return jwt.encode(payload, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        if self.active_kid is None:
+            return jwt.decode(token, self.signing_key, algorithms=[self.algorithm])
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.verification_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown key id {kid!r}")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        Открытые ключи в формате JWKS. Симметричный ключ не публикуется.
+        """
+        if self.active_kid is None:
+            return {"keys": []}
+        algorithm = get_default_algorithms()[self.algorithm]
+        keys = []
+        for kid, public_key in self.verification_keys.items():
+            jwk = algorithm.to_jwk(public_key, as_dict=True)
+            jwk.update({"kid": kid, "alg": self.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
@@ -1,25 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from routers import users
 from routers import admin
 from routers import mock_objects
+from routers import internal
+from routers import wellknown
+from routers import introspection
+from auth import hashing_pool, setup_bcrypt_policy
+from invalidation import invalidation_channel
+from revocation import token_denylist
+from audit import audit_log
+from database import async_engine, async_session_maker, replica_engine
+from timing import TIMING_ENABLED, TimingMiddleware
+from warmup import warmup, warmup_state
+from schemas.internal import ReadyStatus
+from serialization import FastJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск и остановка фоновых ресурсов приложения.
+    """
+    # Калибровка bcrypt нагружает CPU, поэтому выполняется вне event loop
+    await asyncio.to_thread(setup_bcrypt_policy)
+    await invalidation_channel.start()
+    await audit_log.start()
+    async with async_session_maker() as db:
+        await token_denylist.load(db)
+    await token_denylist.start()
+    # Прогрев идёт в фоне: процесс уже принимает запросы, а /ready отвечает 503 до его окончания
+    warmup_task = asyncio.create_task(warmup())
+    yield
+    warmup_task.cancel()
+    try:
+        await warmup_task
+    except asyncio.CancelledError:
+        pass
+    # События аудита из очереди дописываются до закрытия соединений
+    await audit_log.stop()
+    await token_denylist.stop()
+    await invalidation_channel.stop()
+    hashing_pool.shutdown()
+    # Соединения пулов закрываются явно: иначе воркер под serve.py держит их до SIGKILL,
+    # а с aiosqlite процесс зависает на выходе
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    await async_engine.dispose()
 
 
 # Создаём приложение FastAPI
 app = FastAPI(
     title="Auth & RBAC Service",
     description="Система аутентификации и разграничения прав доступа",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Подключение маршрутов
 app.include_router(users.router)
 app.include_router(admin.router)
 app.include_router(mock_objects.router)
+app.include_router(internal.router)
+app.include_router(internal.metrics_router)
+app.include_router(wellknown.router)
+app.include_router(introspection.router)
+
+# Замер фаз запроса; при выключенных метриках middleware не подключается вовсе
+if TIMING_ENABLED:
+    app.add_middleware(TimingMiddleware)
 
 
 # Корневой эндпоинт для проверки
-@app.get("/")
+@app.get("/", response_model=dict[str, str])
 async def root():
     """
     Корневой маршрут, подтверждающий, что API работает.
     """
-    return {"message": "Добро пожаловать!"}
\ No newline at end of file
+    return {"message": "Добро пожаловать!"}
+
+
+@app.get("/ready", response_model=ReadyStatus,
+         responses={503: {"model": ReadyStatus, "description": "Прогрев не завершён"}})
+async def ready():
+    """
+    Готовность к приёму трафика: 200 после завершения прогрева, до этого 503.
+    """
+    body = {
+        "ready": warmup_state.ready,
+        "attempts": warmup_state.attempts,
+        "duration_ms": warmup_state.duration_ms,
+        "steps": warmup_state.steps,
+        "error": warmup_state.error,
+    }
+    return FastJSONResponse(body, status_code=200 if warmup_state.ready else 503)
@@ -11,6 +11,11 @@ from models.users import User
 from models.roles import Role
 from models.permissions import Permission
 from models.role_permissions import RolePermission
+from models.rbac_state import RbacState
+from models.revoked_tokens import RevokedToken
+from models.login_attempts import LoginAttempt
+from models.audit_events import AuditEvent
+from models.role_inheritance import RoleInheritance
 
 import os
 from dotenv import load_dotenv
@@ -2,6 +2,12 @@ from .users import User
 from .roles import Role
 from .permissions import Permission
 from .role_permissions import RolePermission
+from .rbac_state import RbacState
+from .revoked_tokens import RevokedToken
+from .login_attempts import LoginAttempt
+from .audit_events import AuditEvent
+from .role_inheritance import RoleInheritance
 
 
-__all__ = ["User", "Role", "Permission", "RolePermission"]
\ No newline at end of file
+__all__ = ["User", "Role", "Permission", "RolePermission", "RbacState", "RevokedToken", "LoginAttempt",
+           "AuditEvent", "RoleInheritance"]
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from database import Base
+
+
+class RbacState(Base):
+    __tablename__ = "rbac_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    user_epoch: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
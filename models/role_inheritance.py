@@ -0,0 +1,11 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from database import Base
+
+
+class RoleInheritance(Base):
+    __tablename__ = "role_inheritance"
+
+    # Роль role_id получает все права роли parent_role_id и, транзитивно, её родителей
+    role_id: Mapped[int] = mapped_column(ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True)
+    parent_role_id: Mapped[int] = mapped_column(ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,45 @@
+from collections.abc import AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import read_session_maker
+from serialization import dumps
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+async def keyset_page(db: AsyncSession, stmt: Select, id_column, cursor: int | None, limit: int):
+    """
+    Возвращает страницу (items, next_cursor) по возрастанию id, начиная после cursor.
+    Запрашивается limit + 1 строк, чтобы без COUNT понять, есть ли следующая страница.
+    """
+    if cursor is not None:
+        stmt = stmt.where(id_column > cursor)
+    rows = (await db.scalars(stmt.order_by(id_column).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+async def _iter_ndjson(stmt: Select, id_column, serialize: Callable[[object], dict]) -> AsyncIterator[bytes]:
+    # Отдельная сессия: поток отдаётся уже после выхода из зависимостей запроса.
+    # Выгрузка — только чтение, поэтому идёт на реплику, если она настроена
+    async with read_session_maker() as db:
+        cursor = None
+        while True:
+            rows, cursor = await keyset_page(db, stmt, id_column, cursor, EXPORT_BATCH_SIZE)
+            if rows:
+                yield b"".join(dumps(serialize(row)) + b"\n" for row in rows)
+            if cursor is None:
+                break
+
+
+def ndjson_response(stmt: Select, id_column, serialize: Callable[[object], dict]) -> StreamingResponse:
+    """
+    Выгрузка всей выборки в NDJSON пачками по EXPORT_BATCH_SIZE строк.
+    """
+    return StreamingResponse(_iter_ndjson(stmt, id_column, serialize), media_type="application/x-ndjson")
@@ -0,0 +1,140 @@
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import delete
+
+from config import (LOGIN_RATE_LIMIT_ENABLED, LOGIN_RATE_LIMIT_EMAIL, LOGIN_RATE_LIMIT_IP,
+                    LOGIN_RATE_LIMIT_BACKEND, LOGIN_RATE_LIMIT_MAX_KEYS)
+from database import async_session_maker, dialect_insert
+from models.login_attempts import LoginAttempt
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """
+    Разбирает лимит вида "5/60" (5 попыток за 60 секунд).
+    """
+    limit, _, period = rate.partition("/")
+    return int(limit), float(period or 60)
+
+
+class MemoryBackend:
+    """
+    Token bucket в памяти процесса. Ключи хранятся в порядке последнего обращения;
+    бакет, простоявший дольше периода, снова полон и удаляется без потери информации.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [токены, время обновления, период]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        while self._buckets:
+            key, (_, updated_at, period) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - updated_at < period:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+    async def hit(self, key: str, limit: int, period: float) -> float:
+        now = time.monotonic()
+        rate = limit / period
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit), now, period]
+        else:
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets), "evictions": self.evictions}
+
+
+class PostgresBackend:
+    """
+    Общий для всех воркеров счётчик попыток в фиксированном окне (таблица login_attempts).
+    Одна попытка — один INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+    """
+
+    def __init__(self, cleanup_every: int = 1000):
+        self.cleanup_every = cleanup_every
+        self._hits = 0
+
+    async def hit(self, key: str, limit: int, period: float) -> float:
+        now = time.time()
+        window = int(now // period)
+        stmt = dialect_insert(LoginAttempt).values(key=key, window=window, count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LoginAttempt.key, LoginAttempt.window],
+            set_={"count": LoginAttempt.count + 1},
+        ).returning(LoginAttempt.count)
+        async with async_session_maker() as db:
+            count = await db.scalar(stmt)
+            self._hits += 1
+            if self._hits % self.cleanup_every == 0:
+                await db.execute(delete(LoginAttempt).where(LoginAttempt.window < window - 1))
+            await db.commit()
+        if count <= limit:
+            return 0.0
+        return (window + 1) * period - now
+
+    def stats(self) -> dict:
+        return {"backend": "postgres", "hits": self._hits}
+
+
+class LoginRateLimiter:
+    """
+    Ограничивает попытки входа по email и по IP клиента до запроса пользователя
+    и проверки пароля, чтобы перебор не расходовал CPU на bcrypt.
+    """
+
+    def __init__(self, backend, email_rate: str, ip_rate: str, enabled: bool = True):
+        self.backend = backend
+        self.email_limit = parse_rate(email_rate)
+        self.ip_limit = parse_rate(ip_rate)
+        self.enabled = enabled
+        self.rejected = 0
+
+    async def check(self, request: Request, email: str):
+        if not self.enabled:
+            return
+        client_ip = request.client.host if request.client else "unknown"
+        retry_after = max(
+            await self.backend.hit(f"ip:{client_ip}", *self.ip_limit),
+            await self.backend.hit(f"email:{email.strip().lower()}", *self.email_limit),
+        )
+        if retry_after > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "rejected": self.rejected, **self.backend.stats()}
+
+
+def create_backend(name: str):
+    if name == "postgres":
+        return PostgresBackend()
+    if name == "memory":
+        return MemoryBackend(max_keys=LOGIN_RATE_LIMIT_MAX_KEYS)
+    raise RuntimeError(f"Unknown rate limit backend: {name}")
+
+
+login_limiter = LoginRateLimiter(
+    backend=create_backend(LOGIN_RATE_LIMIT_BACKEND),
+    email_rate=LOGIN_RATE_LIMIT_EMAIL,
+    ip_rate=LOGIN_RATE_LIMIT_IP,
+    enabled=LOGIN_RATE_LIMIT_ENABLED,
+)
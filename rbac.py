@@ -0,0 +1,253 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import dialect_insert
+from models.permissions import Permission
+from models.role_permissions import RolePermission
+from models.roles import Role
+from models.role_inheritance import RoleInheritance
+from models.rbac_state import RbacState
+from config import RBAC_RECONCILE_SECONDS, RBAC_SNAPSHOT_DIR
+from rbac_snapshot import SnapshotReader
+
+
+RBAC_STATE_ID = 1
+WILDCARD = "*"
+
+
+def grants_match(grants: frozenset[tuple[str, str]], resource: str, action: str) -> bool:
+    """
+    Проверяет право по развёрнутому набору грантов роли. Шаблоны resource:*, *:action
+    и *:* хранятся в том же множестве, поэтому проверка — не более четырёх поисков
+    в хеш-таблице независимо от числа шаблонов и унаследованных прав.
+    """
+    return ((resource, action) in grants
+            or (resource, WILDCARD) in grants
+            or (WILDCARD, action) in grants
+            or (WILDCARD, WILDCARD) in grants)
+
+
+def expand_inheritance(role_ids, parents: dict[int, set[int]]) -> dict[int, frozenset[int]]:
+    """
+    Для каждой роли — она сама и все её предки. Циклы не приводят к зацикливанию.
+    """
+    closure = {}
+    for role_id in role_ids:
+        seen = {role_id}
+        stack = [role_id]
+        while stack:
+            for parent_id in parents.get(stack.pop(), ()):
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    stack.append(parent_id)
+        closure[role_id] = frozenset(seen)
+    return closure
+
+
+async def get_rbac_state(db: AsyncSession) -> tuple[int, int]:
+    """
+    Возвращает сохранённые в базе версию ролей и прав и эпоху пользователей
+    (нули, если строки ещё нет).
+    """
+    result = await db.execute(
+        select(RbacState.version, RbacState.user_epoch).where(RbacState.id == RBAC_STATE_ID)
+    )
+    row = result.first()
+    return (row.version, row.user_epoch) if row else (0, 0)
+
+
+def _bump_state(**increments):
+    # Один INSERT ... ON CONFLICT DO UPDATE: при отсутствии строки параллельные
+    # изменения не пытаются вставить её дважды
+    return dialect_insert(RbacState).values(
+        id=RBAC_STATE_ID, version=increments.get("version", 0), user_epoch=increments.get("user_epoch", 0),
+    ).on_conflict_do_update(
+        index_elements=[RbacState.id],
+        set_={name: getattr(RbacState, name) + step for name, step in increments.items()},
+    )
+
+
+async def bump_rbac_version(db: AsyncSession):
+    """
+    Увеличивает версию ролей и прав в текущей транзакции.
+    Вызывается из админских изменений перед commit.
+    """
+    await db.execute(_bump_state(version=1))
+
+
+async def bump_user_epoch(db: AsyncSession):
+    """
+    Увеличивает эпоху пользователей в текущей транзакции.
+    После этого claims выданных stateless-токенов (роль, is_active) не принимаются
+    на веру, и токены проверяются по базе. Вызывается из
+    POST /admin/users/stateless-tokens/revoke; токены одного пользователя
+    отзываются его водяным знаком (TokenDenylist.revoke_user).
+    """
+    await db.execute(_bump_state(user_epoch=1))
+
+
+async def load_rbac_tables(db: AsyncSession) -> tuple[dict[int, str], dict[int, set[tuple[str, str]]],
+                                                     dict[int, set[int]]]:
+    """
+    Читает роли, прямые права ролей и наследование ролей:
+    (имена ролей, role_id -> пары (resource, action), role_id -> родительские роли).
+    """
+    roles = await db.execute(select(Role.id, Role.name))
+    role_names = {role_id: name for role_id, name in roles}
+
+    rows = await db.execute(
+        select(RolePermission.role_id, Permission.resource, Permission.action)
+        .join(Permission, Permission.id == RolePermission.permission_id)
+    )
+    direct: dict[int, set[tuple[str, str]]] = {role_id: set() for role_id in role_names}
+    for role_id, resource, action in rows:
+        direct.setdefault(role_id, set()).add((resource, action))
+
+    parents: dict[int, set[int]] = {}
+    for role_id, parent_id in await db.execute(select(RoleInheritance.role_id, RoleInheritance.parent_role_id)):
+        parents.setdefault(role_id, set()).add(parent_id)
+    return role_names, direct, parents
+
+
+class PermissionMatrix:
+    """
+    Локальный для процесса снимок RBAC: role_id -> множество пар (resource, action).
+    Унаследованные права разворачиваются при построении снимка, шаблоны с "*"
+    хранятся как есть, поэтому проверка права — несколько поисков в множестве
+    без обращения к базе (см. grants_match). Снимок сверяется с версией в таблице
+    rbac_state не чаще, чем раз в reconcile_seconds. Под супервизором serve.py
+    данные берутся из общего снимка в отображаемом в память файле, а база
+    читается только после локальной invalidate().
+    """
+
+    def __init__(self, reconcile_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+        self.version = -1
+        self.user_epoch = 0
+        self._grants: dict[int, frozenset[tuple[str, str]]] = {}
+        self._role_names: dict[int, str] = {}
+        self._ancestors: dict[int, frozenset[int]] = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._rebuilds = 0
+        self._rebuild_callbacks: list[Callable[[], None]] = []
+        self._snapshot: SnapshotReader | None = None
+        self._generation = 0
+        self._forced = False
+        self._snapshot_loads = 0
+
+    def attach_snapshot(self, reader: SnapshotReader):
+        """
+        Подключает снимок, публикуемый супервизором (см. serve.py).
+        """
+        self._snapshot = reader
+
+    def _sync_snapshot(self) -> bool:
+        # Поколение снимка читается из mmap; новое поколение разбирается один раз.
+        # False — снимка ещё нет, нужно читать базу
+        generation = self._snapshot.generation()
+        if generation is None:
+            return False
+        if generation != self._generation:
+            data = self._snapshot.load(generation)
+            if data is None:
+                return self.version >= 0
+            version, user_epoch, *tables = data
+            self._generation = generation
+            self._snapshot_loads += 1
+            # Локальная перестройка из базы после invalidate() могла уйти вперёд снимка
+            if version > self.version:
+                self._apply(version, *tables)
+            self.user_epoch = max(self.user_epoch, user_epoch)
+        return True
+
+    def _is_fresh(self) -> bool:
+        return self.version >= 0 and time.monotonic() - self._checked_at < self.reconcile_seconds
+
+    async def ensure_fresh(self, db: AsyncSession):
+        """
+        Сверяет снимок с версией в базе и перестраивает его при расхождении.
+        """
+        if self._snapshot is not None and not self._forced and self._sync_snapshot():
+            return
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            version, user_epoch = await get_rbac_state(db)
+            if version != self.version:
+                await self._rebuild(db, version)
+            self.user_epoch = user_epoch
+            self._checked_at = time.monotonic()
+            self._forced = False
+
+    async def _rebuild(self, db: AsyncSession, version: int):
+        self._apply(version, *await load_rbac_tables(db))
+
+    def _apply(self, version: int, role_names: dict[int, str], direct: dict[int, set[tuple[str, str]]],
+               parents: dict[int, set[int]]):
+        ancestors = expand_inheritance(direct, parents)
+        self._grants = {
+            role_id: frozenset().union(*(direct.get(ancestor, ()) for ancestor in ancestors[role_id]))
+            for role_id in direct
+        }
+        self._ancestors = ancestors
+        self._role_names = role_names
+        self.version = version
+        self._rebuilds += 1
+        for callback in self._rebuild_callbacks:
+            callback()
+
+    def on_rebuild(self, callback: Callable[[], None]):
+        """
+        Регистрирует callback, вызываемый после перестройки снимка.
+        """
+        self._rebuild_callbacks.append(callback)
+
+    def invalidate(self):
+        """
+        Заставляет сверить снимок с базой при следующей проверке.
+        """
+        self._checked_at = 0.0
+        self._forced = True
+
+    def has_permission(self, role_id: int, resource: str, action: str) -> bool:
+        grants = self._grants.get(role_id)
+        return grants is not None and grants_match(grants, resource, action)
+
+    def permissions_for(self, role_id: int) -> frozenset[tuple[str, str]]:
+        return self._grants.get(role_id, frozenset())
+
+    def inherits(self, role_id: int, ancestor_id: int) -> bool:
+        """
+        Входит ли ancestor_id в цепочку наследования role_id (или совпадает с ней).
+        """
+        return ancestor_id in self._ancestors.get(role_id, (role_id,))
+
+    def role_exists(self, role_id: int) -> bool:
+        return role_id in self._role_names
+
+    def role_name(self, role_id: int) -> str | None:
+        return self._role_names.get(role_id)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "user_epoch": self.user_epoch,
+            "roles": len(self._role_names),
+            "grants": sum(len(pairs) for pairs in self._grants.values()),
+            "inherited_roles": sum(len(ids) - 1 for ids in self._ancestors.values()),
+            "rebuilds": self._rebuilds,
+            "snapshot_generation": self._generation if self._snapshot is not None else None,
+            "snapshot_loads": self._snapshot_loads,
+        }
+
+
+permission_matrix = PermissionMatrix(reconcile_seconds=RBAC_RECONCILE_SECONDS)
+if RBAC_SNAPSHOT_DIR:
+    permission_matrix.attach_snapshot(SnapshotReader(RBAC_SNAPSHOT_DIR))
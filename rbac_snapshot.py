@@ -0,0 +1,153 @@
+import mmap
+import os
+import struct
+
+
+# Управляющий файл: номер текущего поколения снимка. Файлы данных: rbac-<поколение>.bin
+CONTROL_FILE = "rbac.ctl"
+CONTROL = struct.Struct("<4sHHq")
+CONTROL_MAGIC = b"RBCT"
+MAGIC = b"RBAC"
+FORMAT_VERSION = 1
+# magic, формат, резерв, версия RBAC, эпоха пользователей, число строк, ролей, грантов, связей наследования
+HEADER = struct.Struct("<4sHHqqIIII")
+STRING_REF = struct.Struct("<II")
+ROLE = struct.Struct("<qI")
+GRANT = struct.Struct("<qII")
+PARENT = struct.Struct("<qq")
+
+
+def data_file(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"rbac-{generation}.bin")
+
+
+def encode_snapshot(version: int, user_epoch: int, role_names: dict[int, str],
+                    direct: dict[int, set[tuple[str, str]]], parents: dict[int, set[int]]) -> bytes:
+    """
+    Компактный снимок таблиц roles, role_permissions (с ресурсом и действием)
+    и role_inheritance. Строки хранятся один раз в общей таблице, записи ссылаются на них по индексу.
+    """
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    roles = [ROLE.pack(role_id, intern(name)) for role_id, name in role_names.items()]
+    grants = [GRANT.pack(role_id, intern(resource), intern(action))
+              for role_id, pairs in direct.items() for resource, action in pairs]
+    links = [PARENT.pack(role_id, parent_id) for role_id, ids in parents.items() for parent_id in ids]
+
+    refs, blob, offset = [], [], 0
+    for value in strings:
+        encoded = value.encode("utf-8")
+        refs.append(STRING_REF.pack(offset, len(encoded)))
+        blob.append(encoded)
+        offset += len(encoded)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, version, user_epoch,
+                         len(strings), len(roles), len(grants), len(links))
+    return b"".join([header, *refs, *roles, *grants, *links, *blob])
+
+
+def decode_snapshot(buffer) -> tuple[int, int, dict[int, str], dict[int, set[tuple[str, str]]], dict[int, set[int]]]:
+    """
+    Разбирает снимок прямо из буфера (mmap или bytes) без промежуточной копии файла.
+    Возвращает (версия, эпоха пользователей, имена ролей, прямые гранты, родители ролей).
+    """
+    with memoryview(buffer) as view:
+        magic, fmt, _, version, user_epoch, n_strings, n_roles, n_grants, n_links = HEADER.unpack_from(view)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError("Not an RBAC snapshot")
+
+        offset = HEADER.size
+        sections = []
+        for struct_, count in ((STRING_REF, n_strings), (ROLE, n_roles), (GRANT, n_grants), (PARENT, n_links)):
+            end = offset + struct_.size * count
+            sections.append(struct_.iter_unpack(view[offset:end]))
+            offset = end
+        string_refs, roles, grants, links = sections
+
+        strings = [str(view[offset + start:offset + start + length], "utf-8") for start, length in string_refs]
+        role_names = {role_id: strings[name] for role_id, name in roles}
+        direct: dict[int, set[tuple[str, str]]] = {role_id: set() for role_id in role_names}
+        for role_id, resource, action in grants:
+            direct.setdefault(role_id, set()).add((strings[resource], strings[action]))
+        parents: dict[int, set[int]] = {}
+        for role_id, parent_id in links:
+            parents.setdefault(role_id, set()).add(parent_id)
+    return version, user_epoch, role_names, direct, parents
+
+
+class SnapshotWriter:
+    """
+    Публикует снимки в каталоге (лучше в tmpfs, например /dev/shm): файл данных
+    пишется целиком и переименовывается, затем в управляющем файле меняется номер поколения.
+    Предыдущие файлы данных остаются keep поколений, пока воркеры их перечитывают.
+    """
+
+    def __init__(self, directory: str, keep: int = 3):
+        self.directory = directory
+        self.keep = keep
+        self.generation = 0
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, CONTROL_FILE)
+        with open(path, "wb") as f:
+            f.write(CONTROL.pack(CONTROL_MAGIC, FORMAT_VERSION, 0, 0))
+        self._fd = os.open(path, os.O_RDWR)
+        self._control = mmap.mmap(self._fd, CONTROL.size)
+
+    def publish(self, data: bytes) -> int:
+        generation = self.generation + 1
+        path = data_file(self.directory, generation)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        # Номер поколения — выровненное 8-байтовое поле, читатели видят старое или новое значение
+        CONTROL.pack_into(self._control, 0, CONTROL_MAGIC, FORMAT_VERSION, 0, generation)
+        self.generation = generation
+        stale = data_file(self.directory, generation - self.keep)
+        if os.path.exists(stale):
+            os.remove(stale)
+        return generation
+
+    def close(self):
+        self._control.close()
+        os.close(self._fd)
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+
+class SnapshotReader:
+    """
+    Читает снимки, опубликованные SnapshotWriter. Управляющий файл отображается
+    в память один раз, проверка поколения — чтение одного числа из mmap.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._control: mmap.mmap | None = None
+
+    def generation(self) -> int | None:
+        if self._control is None:
+            try:
+                with open(os.path.join(self.directory, CONTROL_FILE), "rb") as f:
+                    self._control = mmap.mmap(f.fileno(), CONTROL.size, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+        magic, _, _, generation = CONTROL.unpack_from(self._control)
+        return generation if magic == CONTROL_MAGIC and generation > 0 else None
+
+    def load(self, generation: int):
+        """
+        Разбирает снимок поколения generation или возвращает None, если его файл уже удалён.
+        """
+        try:
+            with open(data_file(self.directory, generation), "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decode_snapshot(mapped)
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session_maker, dialect_insert
+from models.revoked_tokens import RevokedToken
+from models.users import User as UserModel
+from invalidation import invalidation_channel
+from config import REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE, REFRESH_TOKEN_EXPIRE_DAYS
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Компактный фильтр Блума: "нет" — точно нет, "да" — возможно (с заданной вероятностью ошибки).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @classmethod
+    def build(cls, items: list[str], capacity: int, error_rate: float) -> "BloomFilter":
+        bloom = cls(max(capacity, len(items)), error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+
+class TokenDenylist:
+    """
+    Отозванные токены в памяти процесса: фильтр Блума перед точным словарём jti -> exp
+    и "водяные знаки" пользователей (токены с iat не позже отметки отозваны).
+    Истёкшие записи удаляет фоновая задача, состояние хранится в Postgres
+    и загружается при старте, между воркерами изменения расходятся через канал инвалидации.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, max_token_lifetime: timedelta,
+                 purge_interval: float = 60.0, rebuild_ratio: float = 0.5):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.purge_interval = purge_interval
+        self.rebuild_ratio = rebuild_ratio
+        self._bloom = BloomFilter(capacity, error_rate)
+        # Сколько jti добавлено в текущий фильтр, включая уже удалённые из словаря
+        self._bloom_items = 0
+        self._revoked: dict[str, int] = {}
+        self._watermarks: dict[int, int] = {}
+        self.max_token_lifetime = max_token_lifetime
+        self._task: asyncio.Task | None = None
+        self.bloom_false_positives = 0
+        self.purges = 0
+        self.bloom_rebuilds = 0
+
+    def _add_jti(self, jti: str, exp: int):
+        # Эхо собственного уведомления приходит повторно и не должно считаться новой записью
+        if exp <= time.time() or jti in self._revoked:
+            return
+        self._revoked[jti] = exp
+        self._bloom.add(jti)
+        self._bloom_items += 1
+
+    def _set_watermark(self, user_id: int, watermark: int):
+        if watermark > self._watermarks.get(user_id, 0):
+            self._watermarks[user_id] = watermark
+
+    def _on_message(self, key: str):
+        kind, jti_or_user, value = key.split(":", 2)
+        if kind == "jti":
+            self._add_jti(jti_or_user, int(value))
+        elif kind == "user":
+            self._set_watermark(int(jti_or_user), int(value))
+
+    def purge(self) -> bool:
+        """
+        Удаляет истёкшие записи из словаря и водяные знаки. Фильтр Блума не трогает:
+        возвращает True, когда его стоит пересобрать — удалённых записей в нём
+        не меньше rebuild_ratio или он заполнен сверх расчётной ёмкости.
+        """
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        # Водяной знак не нужен, когда истекли все токены, выданные до него
+        horizon = now - self.max_token_lifetime.total_seconds()
+        self._watermarks = {uid: mark for uid, mark in self._watermarks.items() if mark > horizon}
+        self.purges += 1
+        stale = self._bloom_items - len(self._revoked)
+        return (stale > 0 and stale >= self.rebuild_ratio * self._bloom_items) \
+            or self._bloom_items > self._bloom.capacity
+
+    def _swap_bloom(self, bloom: BloomFilter, built_from: list[str]):
+        # jti, отозванные во время сборки, уже есть в словаре, но не в новом фильтре
+        if len(built_from) != len(self._revoked):
+            for jti in self._revoked.keys() - set(built_from):
+                bloom.add(jti)
+        self._bloom = bloom
+        self._bloom_items = len(self._revoked)
+        self.bloom_rebuilds += 1
+
+    async def rebuild_bloom(self):
+        """
+        Пересобирает фильтр Блума по живым записям в потоке, не занимая event loop.
+        """
+        jtis = list(self._revoked)
+        bloom = await asyncio.to_thread(BloomFilter.build, jtis, self.capacity, self.error_rate)
+        self._swap_bloom(bloom, jtis)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                if self.purge():
+                    await self.rebuild_bloom()
+            except Exception:
+                logger.exception("Failed to purge revoked tokens")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        Проверяет токен по jti и водяному знаку пользователя без обращения к базе.
+        """
+        watermark = self._watermarks.get(int(payload["sub"]))
+        if watermark is not None and payload.get("iat", 0) <= watermark:
+            return True
+        jti = payload.get("jti")
+        if jti is None or jti not in self._bloom:
+            return False
+        if jti in self._revoked:
+            return True
+        self.bloom_false_positives += 1
+        return False
+
+    async def load(self, db: AsyncSession):
+        """
+        Загружает действующие отзывы из базы и удаляет истёкшие строки.
+        """
+        now = datetime.now(timezone.utc)
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.commit()
+
+        rows = await db.execute(select(RevokedToken.jti, RevokedToken.expires_at))
+        for jti, expires_at in rows:
+            self._add_jti(jti, int(expires_at.timestamp()))
+
+        rows = await db.execute(
+            select(UserModel.id, UserModel.tokens_valid_after)
+            .where(UserModel.tokens_valid_after > now - self.max_token_lifetime)
+        )
+        for user_id, valid_after in rows:
+            self._set_watermark(user_id, int(valid_after.timestamp()))
+        if self.purge():
+            await self.rebuild_bloom()
+
+    async def reload(self):
+        """
+        Перечитывает отзывы из базы, например после разрыва канала инвалидации.
+        """
+        async with async_session_maker() as db:
+            await self.load(db)
+
+    async def revoke(self, db: AsyncSession, *payloads: dict):
+        """
+        Отзывает токены по jti: сохраняет в базе и рассылает всем воркерам.
+        """
+        payloads = [p for p in payloads if p.get("jti") and p["jti"] not in self._revoked]
+        if not payloads:
+            return
+        # Повторный выход или два одновременных выхода с одним токеном не конфликтуют по jti
+        await db.execute(
+            dialect_insert(RevokedToken).values([
+                {
+                    "jti": payload["jti"],
+                    "user_id": int(payload["sub"]),
+                    "expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc),
+                }
+                for payload in payloads
+            ]).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        await db.commit()
+        for payload in payloads:
+            await invalidation_channel.publish("revoke", f"jti:{payload['jti']}:{int(payload['exp'])}")
+
+    async def revoke_user(self, user_id: int, valid_after: datetime):
+        """
+        Рассылает водяной знак пользователя после того, как вызывающий сохранил
+        users.tokens_valid_after: все токены, выданные до него, отзываются одной операцией.
+        """
+        await invalidation_channel.publish("revoke", f"user:{user_id}:{int(valid_after.timestamp())}")
+
+    def stats(self) -> dict:
+        return {
+            "revoked_jti": len(self._revoked),
+            "watermarks": len(self._watermarks),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "bloom_items": self._bloom_items,
+            "bloom_false_positives": self.bloom_false_positives,
+            "bloom_rebuilds": self.bloom_rebuilds,
+            "purges": self.purges,
+        }
+
+
+token_denylist = TokenDenylist(
+    capacity=REVOCATION_BLOOM_CAPACITY,
+    error_rate=REVOCATION_BLOOM_ERROR_RATE,
+    max_token_lifetime=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+)
+invalidation_channel.subscribe("revoke", token_denylist._on_message)
+invalidation_channel.on_reconnect(token_denylist.reload)
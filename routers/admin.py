@@ -1,31 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from models.roles import Role
 from models.permissions import Permission
 from models.role_permissions import RolePermission
-from schemas.users import User as UserSchema
-from db_depends import get_async_db
-from auth import get_current_admin
+from models.role_inheritance import RoleInheritance
+from models.users import User as UserModel
+from schemas.users import User as UserSchema, ImportReport, Message, EffectivePermissions
+from schemas.admin import Role as RoleSchema, Permission as PermissionSchema, Page
+from db_depends import get_async_db, get_read_db, read_your_writes
+from auth import Principal, get_current_admin
+from rbac import WILDCARD, bump_rbac_version, bump_user_epoch, permission_matrix
+from pagination import keyset_page, ndjson_response
+from serialization import dump_orm, orm_response, page_response
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+PageSize = Annotated[int, Query(ge=1, le=500, description="Размер страницы")]
+Cursor = Annotated[int | None, Query(description="next_cursor предыдущей страницы")]
+ListFormat = Annotated[str, Query(alias="format", pattern="^(json|ndjson)$",
+                                  description="json — страница, ndjson — потоковая выгрузка всей выборки")]
+
 
-@router.get("/roles")
-async def list_roles(db: AsyncSession = Depends(get_async_db),
-                     admin: UserSchema = Depends(get_current_admin)):
+@router.get("/roles", response_model=Page[RoleSchema])
+async def list_roles(cursor: Cursor = None,
+                     limit: PageSize = 50,
+                     name: str | None = Query(None, description="Фильтр по названию"),
+                     fmt: ListFormat = "json",
+                     db: AsyncSession = Depends(get_read_db),
+                     admin: Principal = Depends(get_current_admin)):
     """
-    Возвращает список ролей
+    Возвращает список ролей постранично (keyset по id) или потоком NDJSON.
     """
-    result = await db.scalars(select(Role))
-    return result.all()
+    stmt = select(Role)
+    if name is not None:
+        stmt = stmt.where(Role.name == name)
+    if fmt == "ndjson":
+        return ndjson_response(stmt, Role.id, lambda row: dump_orm(RoleSchema, row))
+    items, next_cursor = await keyset_page(db, stmt, Role.id, cursor, limit)
+    return page_response(RoleSchema, items, next_cursor)
 
 
-@router.post("/roles")
+@router.post("/roles", response_model=RoleSchema)
 async def create_role(name: str, db: AsyncSession = Depends(get_async_db),
-                      admin: UserSchema = Depends(get_current_admin)):
+                      admin: Principal = Depends(get_current_admin)):
     """
     Создание ролей с проверкой уникальности.
     """
@@ -34,28 +56,51 @@ async def create_role(name: str, db: AsyncSession = Depends(get_async_db),
         raise HTTPException(status_code=400, detail="Role already exists")
     role = Role(name=name)
     db.add(role)
+    await bump_rbac_version(db)
     await db.commit()
+    permission_matrix.invalidate()
+    await read_your_writes.mark(admin.id)
     await db.refresh(role)
-    return role
+    return orm_response(RoleSchema, role)
 
 
-@router.get("/permissions")
-async def list_permissions(db: AsyncSession = Depends(get_async_db),
-                           admin: UserSchema = Depends(get_current_admin)):
+@router.get("/permissions", response_model=Page[PermissionSchema])
+async def list_permissions(cursor: Cursor = None,
+                           limit: PageSize = 50,
+                           resource: str | None = Query(None, description="Фильтр по ресурсу"),
+                           action: str | None = Query(None, description="Фильтр по действию"),
+                           role_id: int | None = Query(None, description="Только права этой роли"),
+                           fmt: ListFormat = "json",
+                           db: AsyncSession = Depends(get_read_db),
+                           admin: Principal = Depends(get_current_admin)):
     """
-    Возвращает список прав.
+    Возвращает список прав постранично (keyset по id) или потоком NDJSON.
     """
-    result = await db.scalars(select(Permission))
-    return result.all()
+    stmt = select(Permission)
+    if resource is not None:
+        stmt = stmt.where(Permission.resource == resource)
+    if action is not None:
+        stmt = stmt.where(Permission.action == action)
+    if role_id is not None:
+        stmt = stmt.join(RolePermission, RolePermission.permission_id == Permission.id).where(
+            RolePermission.role_id == role_id
+        )
+    if fmt == "ndjson":
+        return ndjson_response(stmt, Permission.id, lambda row: dump_orm(PermissionSchema, row))
+    items, next_cursor = await keyset_page(db, stmt, Permission.id, cursor, limit)
+    return page_response(PermissionSchema, items, next_cursor)
 
 
-@router.post("/permissions")
+@router.post("/permissions", response_model=PermissionSchema)
 async def create_permission(resource: str, action: str,
                             db: AsyncSession = Depends(get_async_db),
-                            admin: UserSchema = Depends(get_current_admin)):
+                            admin: Principal = Depends(get_current_admin)):
     """
-    Создание прав с проверкой уникальности.
+    Создание прав с проверкой уникальности. Ресурс или действие "*" задают
+    шаблон: items:* — любое действие над items, *:read — чтение любого ресурса.
     """
+    if any(WILDCARD in value and value != WILDCARD for value in (resource, action)):
+        raise HTTPException(status_code=400, detail="Wildcard must replace the whole resource or action")
     existing = await db.scalars(
         select(Permission).where(Permission.resource == resource, Permission.action == action)
     )
@@ -63,21 +108,25 @@ async def create_permission(resource: str, action: str,
         raise HTTPException(status_code=400, detail="Permission already exists")
     perm = Permission(resource=resource, action=action)
     db.add(perm)
+    await bump_rbac_version(db)
     await db.commit()
+    permission_matrix.invalidate()
+    await read_your_writes.mark(admin.id)
     await db.refresh(perm)
-    return perm
+    return orm_response(PermissionSchema, perm)
 
 
-@router.post("/roles/{role_id}/permissions/{permission_id}")
+@router.post("/roles/{role_id}/permissions/{permission_id}", response_model=Message)
 async def assign_permission_to_role(role_id: int, permission_id: int,
                                     db: AsyncSession = Depends(get_async_db),
-                                    admin: UserSchema = Depends(get_current_admin)):
+                                    admin: Principal = Depends(get_current_admin)):
     """
     Добавление прав ролям
     """
     rp = RolePermission(role_id=role_id, permission_id=permission_id)
     db.add(rp)
     try:
+        await bump_rbac_version(db)
         await db.commit()
     except IntegrityError:
         await db.rollback()
@@ -92,4 +141,138 @@ async def assign_permission_to_role(role_id: int, permission_id: int,
             detail="Database error"
         )
 
-    return {"detail": "Permission assigned"}
\ No newline at end of file
+    permission_matrix.invalidate()
+    await read_your_writes.mark(admin.id)
+    return {"detail": "Permission assigned"}
+
+
+@router.post("/roles/{role_id}/parents/{parent_id}", response_model=Message)
+async def add_role_parent(role_id: int, parent_id: int,
+                          db: AsyncSession = Depends(get_async_db),
+                          admin: Principal = Depends(get_current_admin)):
+    """
+    Наследование ролей: роль role_id получает все права роли parent_id.
+    """
+    if role_id == parent_id:
+        raise HTTPException(status_code=400, detail="Role cannot inherit itself")
+    # Проверки идут по снимку, сверенному с базой прямо сейчас
+    permission_matrix.invalidate()
+    await permission_matrix.ensure_fresh(db)
+    if not permission_matrix.role_exists(role_id) or not permission_matrix.role_exists(parent_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+    if permission_matrix.inherits(parent_id, role_id):
+        raise HTTPException(status_code=400, detail="Role inheritance cycle")
+
+    db.add(RoleInheritance(role_id=role_id, parent_role_id=parent_id))
+    try:
+        await bump_rbac_version(db)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role already inherits this role"
+        )
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error"
+        )
+
+    permission_matrix.invalidate()
+    await read_your_writes.mark(admin.id)
+    return {"detail": "Role inheritance added"}
+
+
+@router.delete("/roles/{role_id}/parents/{parent_id}", response_model=Message)
+async def remove_role_parent(role_id: int, parent_id: int,
+                             db: AsyncSession = Depends(get_async_db),
+                             admin: Principal = Depends(get_current_admin)):
+    """
+    Отмена наследования роли.
+    """
+    result = await db.execute(
+        delete(RoleInheritance).where(RoleInheritance.role_id == role_id,
+                                      RoleInheritance.parent_role_id == parent_id)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role inheritance not found")
+    await bump_rbac_version(db)
+    await db.commit()
+    permission_matrix.invalidate()
+    await read_your_writes.mark(admin.id)
+    return {"detail": "Role inheritance removed"}
+
+
+@router.get("/roles/{role_id}/effective-permissions", response_model=EffectivePermissions)
+async def role_effective_permissions(role_id: int,
+                                     db: AsyncSession = Depends(get_async_db),
+                                     admin: Principal = Depends(get_current_admin)):
+    """
+    Развёрнутые права роли: собственные и унаследованные, шаблоны с "*" как есть.
+    """
+    await permission_matrix.ensure_fresh(db)
+    if not permission_matrix.role_exists(role_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+    return EffectivePermissions(
+        role_id=role_id,
+        role=permission_matrix.role_name(role_id),
+        version=permission_matrix.version,
+        permissions=sorted(f"{resource}:{action}" for resource, action in permission_matrix.permissions_for(role_id)),
+    )
+
+
+@router.get("/users", response_model=Page[UserSchema])
+async def list_users(cursor: Cursor = None,
+                     limit: PageSize = 50,
+                     role_id: int | None = Query(None, description="Фильтр по роли"),
+                     is_active: bool | None = Query(None, description="Фильтр по активности"),
+                     fmt: ListFormat = "json",
+                     db: AsyncSession = Depends(get_read_db),
+                     admin: Principal = Depends(get_current_admin)):
+    """
+    Возвращает список пользователей постранично (keyset по id) или потоком NDJSON.
+    """
+    stmt = select(UserModel)
+    if role_id is not None:
+        stmt = stmt.where(UserModel.role_id == role_id)
+    if is_active is not None:
+        stmt = stmt.where(UserModel.is_active == is_active)
+    if fmt == "ndjson":
+        return ndjson_response(stmt, UserModel.id, lambda row: dump_orm(UserSchema, row))
+    items, next_cursor = await keyset_page(db, stmt, UserModel.id, cursor, limit)
+    return page_response(UserSchema, items, next_cursor)
+
+
+@router.post("/users/stateless-tokens/revoke", response_model=Message)
+async def revoke_stateless_claims(db: AsyncSession = Depends(get_async_db),
+                                  admin: Principal = Depends(get_current_admin)):
+    """
+    Отзывает доверие к claims всех выданных stateless-токенов (роль, is_active):
+    после изменений пользователей в обход API, например миграцией или правкой в базе.
+    Токены остаются действительными, но снова проверяются по базе до перевыпуска.
+    """
+    await bump_user_epoch(db)
+    await db.commit()
+    permission_matrix.invalidate()
+    return {"detail": "Stateless token claims revoked"}
+
+
+@router.post("/users/import", response_model=ImportReport)
+async def import_users(file: UploadFile,
+                       fmt: str = Query("ndjson", alias="format", description="ndjson или csv"),
+                       db: AsyncSession = Depends(get_async_db),
+                       admin: Principal = Depends(get_current_admin)):
+    """
+    Массовый импорт пользователей из NDJSON/CSV. Файл читается потоково,
+    ошибки отдельных строк возвращаются в отчёте и не прерывают импорт.
+    """
+    # Модуль импорта с пулом процессов нужен редко и загружается при первом вызове
+    from bulk_import import FORMATS, UserImporter, iter_lines
+
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(FORMATS)}")
+    importer = UserImporter(db)
+    return await importer.run(iter_lines(file.read), fmt)
@@ -0,0 +1,75 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from config import INTERNAL_KEY
+from database import async_engine, pool_stats, replica_engine, replica_pool_stats
+from auth import hashing_pool, principal_cache, token_cache, bcrypt_policy
+from invalidation import invalidation_channel
+from revocation import token_denylist
+from rbac import permission_matrix
+from ratelimit import login_limiter
+from timing import render_metrics
+from audit import audit_log
+from db_depends import read_your_writes, session_stats
+
+
+async def verify_internal_client(x_internal_key: str | None = Header(default=None),
+                                 authorization: str | None = Header(default=None)):
+    """
+    Проверяет ключ мониторинга: заголовок X-Internal-Key или Authorization: Bearer
+    (так его передаёт Prometheus). Без INTERNAL_KEY эндпоинты отключены.
+    """
+    if not INTERNAL_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Internal endpoints are disabled")
+    key = x_internal_key
+    if key is None and authorization:
+        scheme, _, credentials = authorization.partition(" ")
+        key = credentials if scheme.lower() == "bearer" else None
+    if not key or not hmac.compare_digest(key, INTERNAL_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal key")
+
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(verify_internal_client)])
+metrics_router = APIRouter(tags=["internal"], dependencies=[Depends(verify_internal_client)])
+
+
+@router.get("/stats", response_model=dict[str, dict | None])
+async def stats():
+    """
+    Внутренние метрики сервиса для диагностики под нагрузкой.
+    """
+    return {
+        "hashing": hashing_pool.stats(),
+        "bcrypt": bcrypt_policy,
+        "db_pool": pool_stats.stats(async_engine.pool),
+        "db_replica_pool": replica_pool_stats.stats(replica_engine.pool) if replica_engine else None,
+        "db_sessions": session_stats.stats(),
+        "read_your_writes": read_your_writes.stats(),
+        "rbac": permission_matrix.stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "invalidation": invalidation_channel.stats(),
+        "revocation": token_denylist.stats(),
+        "login_rate_limit": login_limiter.stats(),
+        "audit": audit_log.stats(),
+    }
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Гистограммы задержек по маршрутам и фазам в формате Prometheus.
+    """
+    pool = async_engine.pool
+    return render_metrics({
+        "auth_hashing_pending": hashing_pool.stats()["pending"],
+        "auth_hashing_rejected_total": hashing_pool.stats()["rejected"],
+        "auth_db_pool_in_use": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "auth_db_pool_timeouts_total": pool_stats.timeouts,
+        "auth_db_requests_total": session_stats.requests,
+        "auth_db_requests_untouched_total": session_stats.untouched,
+        "auth_audit_queued": audit_log.stats()["queued"],
+        "auth_audit_dropped_total": audit_log.dropped,
+    })
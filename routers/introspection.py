@@ -0,0 +1,97 @@
+import hmac
+
+import jwt
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import Principal, decode_token, parse_permission, principal_cache
+from config import INTROSPECTION_KEY
+from db_depends import get_async_db, get_read_db
+from models.users import User as UserModel
+from rbac import permission_matrix
+from revocation import token_denylist
+from schemas.introspection import IntrospectionRequest, IntrospectionResponse, TokenIntrospection
+
+
+router = APIRouter(prefix="/oauth", tags=["oauth"])
+
+
+async def verify_introspection_client(x_introspection_key: str | None = Header(default=None)):
+    """
+    Проверяет ключ шлюза. Без INTROSPECTION_KEY эндпоинт отключён.
+    """
+    if not INTROSPECTION_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Introspection is disabled")
+    if not x_introspection_key or not hmac.compare_digest(x_introspection_key, INTROSPECTION_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid introspection key")
+
+
+@router.post("/introspect", response_model=IntrospectionResponse, response_model_exclude_none=True,
+             dependencies=[Depends(verify_introspection_client)])
+async def introspect(data: IntrospectionRequest, db: AsyncSession = Depends(get_async_db),
+                     read_db: AsyncSession = Depends(get_read_db)):
+    """
+    Пакетная интроспекция токенов для шлюза: активность, пользователь, роль
+    и результаты проверок прав для всех токенов одним ответом.
+    Пользователи, которых нет в кэше, читаются одним запросом с IN.
+    """
+    try:
+        checks = [(pair, parse_permission(pair)) for pair in data.checks]
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(exc))
+
+    # Проверка подписи, срока и отзыва без обращения к базе
+    payloads: list[dict | None] = []
+    for token in data.tokens:
+        try:
+            payload = decode_token(token)
+            int(payload["sub"])
+        except (jwt.PyJWTError, KeyError, ValueError):
+            payload = None
+        if payload is not None and token_denylist.is_revoked(payload):
+            payload = None
+        payloads.append(payload)
+
+    user_ids = {int(p["sub"]) for p in payloads if p is not None}
+    principals: dict[int, Principal] = {}
+    watermarks: dict[int, float] = {}
+    missing = set()
+    for user_id in user_ids:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            principals[user_id] = principal
+        else:
+            missing.add(user_id)
+
+    await permission_matrix.ensure_fresh(db)
+    if missing:
+        rows = await read_db.execute(
+            select(UserModel.id, UserModel.role_id, UserModel.tokens_valid_after)
+            .where(UserModel.id.in_(missing), UserModel.is_active == True)
+        )
+        for user_id, role_id, valid_after in rows:
+            principal = Principal(id=user_id, role_id=role_id,
+                                  role_name=permission_matrix.role_name(role_id), is_active=True)
+            principals[user_id] = principal
+            principal_cache.set(user_id, principal)
+            if valid_after is not None:
+                watermarks[user_id] = valid_after.timestamp()
+
+    results = []
+    for payload in payloads:
+        principal = principals.get(int(payload["sub"])) if payload is not None else None
+        if principal is None or payload.get("iat", 0) <= watermarks.get(principal.id, -1):
+            results.append(TokenIntrospection(active=False))
+            continue
+        results.append(TokenIntrospection(
+            active=True,
+            sub=payload["sub"],
+            role_id=principal.role_id,
+            role=principal.role_name,
+            exp=payload.get("exp"),
+            iat=payload.get("iat"),
+            jti=payload.get("jti"),
+            permissions={pair: principal.has_permission(resource, action) for pair, (resource, action) in checks},
+        ))
+    return IntrospectionResponse(results=results)
@@ -10,12 +10,12 @@ items = [
     {"id": 3, "name": "Item C"},
 ]
 
-@router.get("/items")
+@router.get("/items", response_model=list[dict])
 async def list_items(permission: bool = Depends(check_permission("items", "read"))):
     return items
 
 
-@router.post("/items")
+@router.post("/items", response_model=dict)
 async def create_item(item: dict, permission: bool = Depends(check_permission("items", "create"))):
     new_id = max(i["id"] for i in items) + 1
     item["id"] = new_id
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from datetime import datetime, timezone
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi.security import OAuth2PasswordRequestForm
 
-from models.roles import Role
 from models.users import User as UserModel
-from schemas.users import UserCreate, UserUpdate, User as UserSchema
-from db_depends import get_async_db
-from auth import hash_password, verify_password, create_access_token, create_refresh_token
-from auth import get_current_user
+from schemas.users import UserCreate, UserUpdate, User as UserSchema, EffectivePermissions
+from schemas.users import Token, AccessToken, Message
+from db_depends import get_async_db, get_read_db, read_your_writes
+from database import dialect_insert
+from auth import hash_password_async, verify_and_update_password_async, create_access_token, create_refresh_token
+from auth import bcrypt_policy
+from auth import get_current_user, access_token_claims, invalidate_principal, decode_token
+from auth import get_current_principal, oauth2_scheme, Principal
+from revocation import token_denylist
+from ratelimit import login_limiter
+from rbac import permission_matrix
+from serialization import orm_response
+from audit import audit_log, client_ip
 
 import jwt
-from config import SECRET_KEY, ALGORITHM
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -21,55 +30,83 @@ router = APIRouter(prefix="/users", tags=["users"])
 async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Регистрирует нового пользователя с ролью 'client'.
+    Роль проверяется по локальному снимку RBAC, вставка выполняется одним
+    INSERT ... ON CONFLICT (email) DO NOTHING RETURNING, поэтому одновременные
+    регистрации с одним email корректно получают 409.
     """
 
-    # Проверка уникальности email
-    result = await db.scalars(select(UserModel).where(UserModel.email == user.email))
-    if result.first():
+    # Проверка роли; неизвестная роль могла появиться после последней сверки снимка
+    await permission_matrix.ensure_fresh(db)
+    if not permission_matrix.role_exists(user.role_id):
+        permission_matrix.invalidate()
+        await permission_matrix.ensure_fresh(db)
+        if not permission_matrix.role_exists(user.role_id):
+            raise HTTPException(status_code=400, detail="Role does not exist")
+
+    stmt = (
+        dialect_insert(UserModel)
+        .values(
+            name=user.name,
+            email=user.email,
+            hashed_password=await hash_password_async(user.password),
+            role_id=user.role_id,
+            is_active=True,
+        )
+        .on_conflict_do_nothing(index_elements=[UserModel.email])
+        .returning(UserModel)
+    )
+    db_user = await db.scalar(stmt)
+    if db_user is None:
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT,
                             detail="Email already registered")
-
-    # Проверка роли
-    role = await db.get(Role, user.role_id)
-    if not role:
-        raise HTTPException(status_code=400, detail="Role does not exist")
-
-    # Создание объекта пользователя с хешированным паролем
-    db_user = UserModel(
-        name=user.name,
-        email=user.email,
-        hashed_password=hash_password(user.password),
-        role_id=user.role_id
-    )
-
-    # Добавление в сессию и сохранение в базе
-    db.add(db_user)
     await db.commit()
-    await db.refresh(db_user)
-    return db_user
+    return orm_response(UserSchema, db_user, status_code=status.HTTP_201_CREATED)
 
 
-@router.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+@router.post("/token", response_model=Token)
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(),
+                db: AsyncSession = Depends(get_async_db),
+                read_db: AsyncSession = Depends(get_read_db)):
     """
     Аутентифицирует пользователя и возвращает access_token и refresh_token.
+    Пользователь ищется на реплике; если его там нет (только что
+    зарегистрирован, реплика отстаёт), поиск повторяется на основной базе.
     """
-    result = await db.scalars(
-        select(UserModel).where(UserModel.email == form_data.username, UserModel.is_active == True))
-    user = result.first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Лимит попыток проверяется до запроса пользователя и bcrypt
+    try:
+        await login_limiter.check(request, form_data.username)
+    except HTTPException:
+        await audit_log.emit("login_throttled", subject=form_data.username, ip=client_ip(request))
+        raise
+    stmt = select(UserModel).where(UserModel.email == form_data.username, UserModel.is_active == True)
+    user = (await read_db.scalars(stmt)).first()
+    if user is None and read_db is not db:
+        user = (await db.scalars(stmt)).first()
+    verified, new_hash = (await verify_and_update_password_async(form_data.password, user.hashed_password)
+                          if user else (False, None))
+    if not verified:
+        await audit_log.emit("login_failed", user_id=user.id if user else None,
+                             subject=form_data.username, ip=client_ip(request))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    # Хеш с устаревшей стоимостью bcrypt заменяется, пока пароль известен
+    if new_hash:
+        await db.execute(update(UserModel).where(UserModel.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+        bcrypt_policy["rehashed"] += 1
+    access_token = create_access_token(data=await access_token_claims(user, db))
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    await audit_log.emit("login", user_id=user.id, subject=user.email, ip=client_ip(request))
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
-@router.post("/refresh-token")
-async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
+@router.post("/refresh-token", response_model=AccessToken)
+async def refresh_token(request: Request, refresh_token: str, db: AsyncSession = Depends(get_async_db),
+                        read_db: AsyncSession = Depends(get_read_db)):
     """
     Обновляет access_token с помощью refresh_token.
     """
@@ -79,19 +116,22 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
+        payload = decode_token(refresh_token)
+        user_id = int(payload["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        raise credentials_exception
+    if token_denylist.is_revoked(payload):
         raise credentials_exception
 
-    # Проверка активности пользователя
-    result = await db.scalars(select(UserModel).where(UserModel.id == user_id, UserModel.is_active == True))
+    # Проверка активности пользователя; refresh_token передаётся не в заголовке,
+    # поэтому недавняя запись пользователя проверяется здесь, а не в get_read_db
+    source = db if read_your_writes.is_recent(user_id) else read_db
+    result = await source.scalars(select(UserModel).where(UserModel.id == user_id, UserModel.is_active == True))
     user = result.first()
     if user is None:
         raise credentials_exception
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data=await access_token_claims(user, db))
+    await audit_log.emit("refresh", user_id=user.id, ip=client_ip(request))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -108,20 +148,64 @@ async def update_me(
         current_user.name = data.name
 
     if data.password:
-        current_user.hashed_password = hash_password(data.password)
+        current_user.hashed_password = await hash_password_async(data.password)
 
     db.add(current_user)
     await db.commit()
+    await invalidate_principal(current_user.id)
+    await read_your_writes.mark(current_user.id)
     await db.refresh(current_user)
-    return current_user
+    return orm_response(UserSchema, current_user)
 
 
-@router.post("/logout")
-async def logout():
+@router.get("/me/permissions", response_model=EffectivePermissions,
+            responses={304: {"description": "Права не изменились"}})
+async def my_permissions(
+    response: Response,
+    principal: Principal = Depends(get_current_principal),
+    if_none_match: str | None = Header(default=None),
+):
     """
-    Фиктивный Logout
+    Возвращает все эффективные права пользователя. ETag привязан к версии
+    ролей и прав, поэтому клиент может перепроверять их запросом с If-None-Match.
     """
-    return {"detail": "Logout successful. Remove token on client side."}
+    etag = f'"rbac-{permission_matrix.version}-{principal.role_id}"'
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    permissions = permission_matrix.permissions_for(principal.role_id)
+    return EffectivePermissions(
+        role_id=principal.role_id,
+        role=principal.role_name,
+        version=permission_matrix.version,
+        permissions=sorted(f"{resource}:{action}" for resource, action in permissions),
+    )
+
+
+@router.post("/logout", response_model=Message)
+async def logout(
+    request: Request,
+    refresh_token: str | None = None,
+    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Отзывает текущий access_token и, если передан, refresh_token того же пользователя.
+    """
+    payloads = [decode_token(token)]
+    if refresh_token:
+        try:
+            refresh_payload = decode_token(refresh_token)
+        except jwt.PyJWTError:
+            refresh_payload = None
+        if refresh_payload and refresh_payload.get("sub") == str(principal.id):
+            payloads.append(refresh_payload)
+    await token_denylist.revoke(db, *payloads)
+    await audit_log.emit("logout", user_id=principal.id, ip=client_ip(request))
+    return {"detail": "Logout successful"}
 
 
 @router.delete("/me", status_code=204)
@@ -130,5 +214,12 @@ async def delete_me(
     current_user: UserModel = Depends(get_current_user)
 ):
     current_user.is_active = False
+    # Отзыв всех выданных пользователю токенов одной отметкой времени
+    current_user.tokens_valid_after = datetime.now(timezone.utc)
     db.add(current_user)
-    await db.commit()
\ No newline at end of file
+    # Эпоха не меняется: stateless-токены пользователя отклоняет водяной знак,
+    # проверка которого идёт раньше проверки эпохи, а токены остальных остаются stateless
+    await db.commit()
+    await invalidate_principal(current_user.id)
+    await read_your_writes.mark(current_user.id)
+    await token_denylist.revoke_user(current_user.id, current_user.tokens_valid_after)
\ No newline at end of file
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+
+from auth import key_ring
+from config import JWKS_MAX_AGE
+from schemas.wellknown import JWKS
+
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@router.get("/jwks.json", response_model=JWKS)
+async def jwks(response: Response):
+    """
+    Открытые ключи проверки JWT: другие сервисы проверяют токены локально по kid.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={JWKS_MAX_AGE}"
+    return key_ring.jwks()
@@ -0,0 +1,36 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, Field, ConfigDict
+
+
+T = TypeVar("T")
+
+
+class Role(BaseModel):
+    """
+    Модель для ответа с данными роли.
+    """
+    id: int = Field(description="Уникальный идентификатор роли")
+    name: str = Field(description="Название роли")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Permission(BaseModel):
+    """
+    Модель для ответа с данными права.
+    """
+    id: int = Field(description="Уникальный идентификатор права")
+    resource: str = Field(description="Ресурс")
+    action: str = Field(description="Действие")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Страница списка с курсорной (keyset) пагинацией.
+    Для следующей страницы передайте next_cursor в параметре cursor.
+    """
+    items: list[T] = Field(description="Элементы страницы")
+    next_cursor: int | None = Field(description="Курсор следующей страницы или null, если страница последняя")
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class ReadyStatus(BaseModel):
+    """
+    Модель для ответа о готовности сервиса к приёму трафика.
+    """
+    ready: bool = Field(description="Прогрев завершён")
+    attempts: int = Field(description="Число попыток прогрева")
+    duration_ms: float | None = Field(description="Длительность успешного прогрева")
+    steps: dict[str, float] = Field(description="Длительность шагов прогрева, мс")
+    error: str | None = Field(description="Ошибка последней попытки")
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+
+from config import INTROSPECTION_MAX_TOKENS
+
+
+class IntrospectionRequest(BaseModel):
+    """
+    Модель пакетного запроса интроспекции токенов (по мотивам RFC 7662).
+    """
+    tokens: list[str] = Field(max_length=INTROSPECTION_MAX_TOKENS, description="Проверяемые токены")
+    checks: list[str] = Field(default_factory=list, description="Права resource:action для проверки")
+
+
+class TokenIntrospection(BaseModel):
+    """
+    Модель результата интроспекции одного токена. Для неактивного токена заполнено только active.
+    """
+    active: bool = Field(description="Токен действителен и пользователь активен")
+    sub: str | None = Field(default=None, description="ID пользователя")
+    role_id: int | None = Field(default=None, description="ID роли")
+    role: str | None = Field(default=None, description="Название роли")
+    exp: int | None = Field(default=None, description="Время истечения (Unix time)")
+    iat: int | None = Field(default=None, description="Время выдачи (Unix time)")
+    jti: str | None = Field(default=None, description="Идентификатор токена")
+    permissions: dict[str, bool] | None = Field(default=None, description="Результаты проверок checks")
+
+
+class IntrospectionResponse(BaseModel):
+    """
+    Модель ответа пакетной интроспекции; результаты в порядке токенов запроса.
+    """
+    results: list[TokenIntrospection]
@@ -19,6 +19,16 @@ class UserCreate(BaseModel):
         return self
 
 
+class UserImport(BaseModel):
+    """
+    Модель строки массового импорта пользователей (NDJSON или CSV).
+    """
+    name: str = Field(description="Имя пользователя")
+    email: EmailStr = Field(description="Email пользователя")
+    password: str = Field(min_length=8, description="Пароль (минимум 8 символов)")
+    role_id: int = Field(description="ID роли пользователя")
+
+
 class UserUpdate(BaseModel):
     """
     Модель для обновления пользователя.
@@ -31,12 +41,57 @@ class UserUpdate(BaseModel):
 class User(BaseModel):
     """
     Модель для ответа с данными пользователя.
-    Используется в GET-запросах.
+    Используется в GET-запросах. Email проверен при записи в базу,
+    поэтому в ответе это обычная строка без повторной валидации.
     """
     id: int = Field(description="Уникальный идентификатор пользователя")
     name: str = Field(description="Имя пользователя")
-    email: EmailStr = Field(description="Email пользователя")
+    email: str = Field(description="Email пользователя")
     is_active: bool = Field(description="Активность пользователя")
     role_id: int = Field(description="ID роли пользователя")
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class Token(BaseModel):
+    """
+    Модель для ответа на вход по логину и паролю.
+    """
+    access_token: str = Field(description="Access-токен")
+    refresh_token: str = Field(description="Refresh-токен")
+    token_type: str = Field(default="bearer", description="Тип токена")
+
+
+class AccessToken(BaseModel):
+    """
+    Модель для ответа на обновление access-токена.
+    """
+    access_token: str = Field(description="Access-токен")
+    token_type: str = Field(default="bearer", description="Тип токена")
+
+
+class Message(BaseModel):
+    """
+    Модель для ответа с текстовым результатом операции.
+    """
+    detail: str = Field(description="Результат операции")
+
+
+class EffectivePermissions(BaseModel):
+    """
+    Модель для ответа с эффективными правами текущего пользователя.
+    """
+    role_id: int = Field(description="ID роли пользователя")
+    role: str | None = Field(description="Название роли")
+    version: int = Field(description="Версия ролей и прав, к которой привязан ETag")
+    permissions: list[str] = Field(description="Права в формате resource:action")
+
+
+class ImportReport(BaseModel):
+    """
+    Модель для ответа с итогами массового импорта.
+    """
+    processed: int = Field(description="Прочитано строк")
+    inserted: int = Field(description="Создано пользователей")
+    failed: int = Field(description="Строк с ошибками")
+    errors: list[dict] = Field(description="Ошибки по строкам (первые N)")
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class JWKS(BaseModel):
+    """
+    Модель для ответа с набором открытых ключей (RFC 7517).
+    """
+    keys: list[dict] = Field(description="Открытые ключи в формате JWK")
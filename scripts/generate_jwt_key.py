@@ -0,0 +1,40 @@
+import argparse
+import os
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+
+def generate(algorithm: str):
+    if algorithm.startswith("RS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise SystemExit(f"Unsupported algorithm: {algorithm}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Создание ключа подписи JWT для ротации")
+    parser.add_argument("--algorithm", default="RS256", choices=["RS256", "RS384", "RS512", "ES256", "EdDSA"])
+    parser.add_argument("--dir", default=os.getenv("JWT_KEYS_DIR", "keys"))
+    parser.add_argument("--kid", default=None, help="Идентификатор ключа (по умолчанию — текущая дата)")
+    args = parser.parse_args()
+
+    kid = args.kid or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f"{kid}.pem")
+    pem = generate(args.algorithm).private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        f.write(pem)
+    print(f"Key {kid} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import json
+
+from config import BULK_IMPORT_CHUNK_SIZE
+from database import async_session_maker
+from bulk_import import FORMATS, UserImporter, aiter_sync
+
+
+async def run(path: str, fmt: str, chunk_size: int):
+    async with async_session_maker() as db:
+        importer = UserImporter(db, chunk_size=chunk_size)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            report = await importer.run(aiter_sync(f), fmt)
+    print(json.dumps(report.model_dump(), ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт пользователей из NDJSON/CSV")
+    parser.add_argument("path", help="Путь к файлу")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="Формат файла (по умолчанию определяется по расширению)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE, help="Размер пачки вставки")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    asyncio.run(run(args.path, fmt, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
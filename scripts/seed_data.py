@@ -4,7 +4,9 @@ from database import async_session_maker
 from models.roles import Role
 from models.permissions import Permission
 from models.role_permissions import RolePermission
+from models.role_inheritance import RoleInheritance
 from models.users import User
+from models.rbac_state import RbacState
 from auth import hash_password
 
 async def seed():
@@ -15,24 +17,23 @@ async def seed():
         db.add_all([admin_role, client_role])
         await db.commit()
 
-        # Права
-        perms = [
-            Permission(resource="items", action="read"),
-            Permission(resource="items", action="create"),
-            Permission(resource="items", action="update"),
-            Permission(resource="items", action="delete")
-        ]
-        db.add_all(perms)
+        # Права; items:* — любое действие над items
+        read_items = Permission(resource="items", action="read")
+        all_items = Permission(resource="items", action="*")
+        db.add_all([read_items, all_items])
         await db.commit()
 
         # Назначение прав роли client
-        rp_client = [RolePermission(role_id=client_role.id, permission_id=perms[0].id)]
-        db.add_all(rp_client)
+        db.add(RolePermission(role_id=client_role.id, permission_id=read_items.id))
         await db.commit()
 
-        # Назначение прав роли admin
-        rp_admin = [RolePermission(role_id=admin_role.id, permission_id=p.id) for p in perms]
-        db.add_all(rp_admin)
+        # Роль admin наследует права client и получает все действия над items
+        db.add(RoleInheritance(role_id=admin_role.id, parent_role_id=client_role.id))
+        db.add(RolePermission(role_id=admin_role.id, permission_id=all_items.id))
+        await db.commit()
+
+        # Версия ролей и прав для локальных снимков RBAC
+        db.add(RbacState(id=1, version=1, user_epoch=0))
         await db.commit()
 
         # Пользователи
@@ -0,0 +1,71 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него используется стандартный json
+    orjson = None
+
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Компактная сериализация в JSON: orjson, если установлен, иначе json.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse с быстрым кодировщиком. Класс ответа по умолчанию для приложения.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+_field_names: dict[type[BaseModel], tuple[str, ...]] = {}
+
+
+def _names(schema: type[BaseModel]) -> tuple[str, ...]:
+    names = _field_names.get(schema)
+    if names is None:
+        names = _field_names[schema] = tuple(schema.model_fields)
+    return names
+
+
+def dump_orm(schema: type[BaseModel], obj) -> dict:
+    """
+    Словарь полей схемы, прочитанных из ORM-объекта без валидации.
+    Только для доверенных данных из базы с простыми типами полей (int, str, bool, None):
+    повторная проверка Pydantic, в том числе EmailStr, для них лишняя.
+    """
+    names = _names(schema)
+    return {name: getattr(obj, name) for name in names}
+
+
+def dump_orm_many(schema: type[BaseModel], objs) -> list[dict]:
+    names = _names(schema)
+    return [{name: getattr(obj, name) for name in names} for obj in objs]
+
+
+def orm_response(schema: type[BaseModel], obj, status_code: int = 200) -> FastJSONResponse:
+    """
+    Ответ с ORM-объектом: response_model эндпоинта остаётся для документации,
+    а валидация и обход jsonable_encoder пропускаются.
+    """
+    return FastJSONResponse(dump_orm(schema, obj), status_code=status_code)
+
+
+def page_response(schema: type[BaseModel], items, next_cursor: int | None) -> FastJSONResponse:
+    """
+    Страница keyset-пагинации из ORM-объектов (см. schemas.admin.Page).
+    """
+    return FastJSONResponse({"items": dump_orm_many(schema, items), "next_cursor": next_cursor})
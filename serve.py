@@ -0,0 +1,258 @@
+"""
+Запуск сервиса в нескольких процессах uvicorn под общим супервизором.
+
+Супервизор открывает слушающий сокет и передаёт его воркерам, делит между ними
+лимит соединений с базой и потоки bcrypt и публикует снимок ролей и прав в файле
+в /dev/shm: воркеры отображают его в память и перечитывают при смене поколения
+вместо того, чтобы каждый строил снимок запросами к базе.
+
+    python serve.py
+
+SIGHUP — плавный перезапуск: новые воркеры запускаются, и только после их старта
+старые получают SIGTERM и дообслуживают текущие запросы. SIGTERM/SIGINT — остановка.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+
+from config import (SERVE_HOST, SERVE_PORT, SERVE_WORKERS, SERVE_GRACEFUL_TIMEOUT, DB_POOL_BUDGET,
+                    RBAC_SNAPSHOT_INTERVAL, INVALIDATION_CHANNEL, LOGIN_RATE_LIMIT_BACKEND)
+
+
+logger = logging.getLogger("serve")
+
+
+def worker_env(workers: int, snapshot_dir: str) -> dict[str, str]:
+    """
+    Переменные окружения воркеров. Значения, заданные явно, не переопределяются,
+    кроме размера пула при заданном DB_POOL_BUDGET.
+    """
+    env = {"RBAC_SNAPSHOT_DIR": snapshot_dir}
+    if DB_POOL_BUDGET:
+        # Жёсткий лимит: пул делится поровну, соединения сверх пула не открываются
+        per_worker = max(1, DB_POOL_BUDGET // workers)
+        env.update({"DB_POOL_SIZE": str(per_worker), "DB_MAX_OVERFLOW": "0",
+                    "WARMUP_POOL_CONNECTIONS": str(per_worker)})
+    # Потоки и процессы для bcrypt делят ядра между воркерами
+    cpus = os.cpu_count() or 1
+    for name in ("HASH_POOL_WORKERS", "BULK_IMPORT_WORKERS"):
+        if not int(os.getenv(name) or 0):
+            env[name] = str(max(1, cpus // workers))
+    return env
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, ready: Event):
+    """
+    Точка входа процесса-воркера: uvicorn на общем сокете.
+    """
+    import uvicorn
+
+    # Ctrl+C в терминале получает только супервизор; воркеры останавливает его SIGTERM
+    os.setpgrp()
+    config = uvicorn.Config("main:app", timeout_graceful_shutdown=int(SERVE_GRACEFUL_TIMEOUT))
+    server = uvicorn.Server(config)
+
+    async def serve():
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.05)
+        # Воркер, у которого не поднялся lifespan или не импортировалось приложение, готовым не считается
+        if server.started:
+            ready.set()
+        await task
+
+    asyncio.run(serve())
+
+
+@dataclass
+class Worker:
+    process: BaseProcess
+    ready: Event
+
+
+class Supervisor:
+    """
+    Запускает воркеров, перезапускает упавших и выполняет плавный перезапуск.
+    """
+
+    def __init__(self, sock: socket.socket, workers: int):
+        self.sock = sock
+        self.count = workers
+        self.workers: list[Worker] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._reloading = False
+
+    def spawn(self) -> Worker:
+        ready = self._context.Event()
+        process = self._context.Process(target=run_worker, args=(self.sock, ready), name="auth-worker")
+        process.start()
+        logger.info("Started worker %s", process.pid)
+        return Worker(process, ready)
+
+    def start(self):
+        self.workers = [self.spawn() for _ in range(self.count)]
+
+    def respawn_dead(self):
+        if self._reloading:
+            return
+        for index, worker in enumerate(self.workers):
+            if not worker.process.is_alive():
+                logger.warning("Worker %s exited with code %s, restarting",
+                               worker.process.pid, worker.process.exitcode)
+                worker.process.join()
+                self.workers[index] = self.spawn()
+
+    async def reload(self):
+        """
+        Новые воркеры запускаются до остановки старых, поэтому сокет всё время обслуживается.
+        Если хотя бы один новый воркер не стал готовым, новое поколение останавливается, а старое остаётся.
+        """
+        if self._reloading:
+            return
+        self._reloading = True
+        try:
+            logger.info("Reloading workers")
+            old, new = self.workers, [self.spawn() for _ in range(self.count)]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SERVE_GRACEFUL_TIMEOUT
+            while loop.time() < deadline and not all(w.ready.is_set() for w in new) \
+                    and all(w.process.is_alive() for w in new):
+                await asyncio.sleep(0.1)
+            if not all(w.ready.is_set() and w.process.is_alive() for w in new):
+                # Неудачный деплой: старые воркеры продолжают обслуживать запросы
+                logger.error("Reload failed: new workers did not start, keeping the current workers")
+                await self.stop_workers(new)
+                return
+            self.workers = new
+            await self.stop_workers(old)
+        finally:
+            self._reloading = False
+
+    async def stop_workers(self, workers: list[Worker]):
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        loop = asyncio.get_running_loop()
+        # uvicorn дообслуживает запросы до timeout_graceful_shutdown, плюс время на lifespan shutdown
+        deadline = loop.time() + SERVE_GRACEFUL_TIMEOUT + 5
+        while loop.time() < deadline and any(w.process.is_alive() for w in workers):
+            await asyncio.sleep(0.1)
+        for worker in workers:
+            if worker.process.is_alive():
+                logger.warning("Worker %s did not stop in time, killing", worker.process.pid)
+                worker.process.kill()
+            worker.process.join()
+
+
+async def publish_snapshots(writer, stop: asyncio.Event):
+    """
+    Сверяет версию RBAC с базой раз в RBAC_SNAPSHOT_INTERVAL секунд и публикует
+    новый снимок при её изменении. Для этого держится одно соединение.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from database import DATABASE_URL
+    from rbac import get_rbac_state, load_rbac_tables
+    from rbac_snapshot import encode_snapshot
+
+    engine = create_async_engine(DATABASE_URL, pool_size=1, max_overflow=0, pool_pre_ping=True)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    published = None
+    try:
+        while not stop.is_set():
+            try:
+                async with session_maker() as db:
+                    state = await get_rbac_state(db)
+                    if state != published:
+                        generation = writer.publish(encode_snapshot(*state, *await load_rbac_tables(db)))
+                        published = state
+                        logger.info("Published RBAC snapshot %s (version %s, user epoch %s)", generation, *state)
+            except Exception:
+                logger.exception("Failed to publish RBAC snapshot")
+            try:
+                await asyncio.wait_for(stop.wait(), RBAC_SNAPSHOT_INTERVAL)
+            except TimeoutError:
+                pass
+    finally:
+        await engine.dispose()
+
+
+async def supervise(sock: socket.socket, workers: int, snapshot_dir: str):
+    from rbac_snapshot import SnapshotWriter
+
+    writer = SnapshotWriter(snapshot_dir)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    supervisor = Supervisor(sock, workers)
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(supervisor.reload()))
+
+    # Первый снимок публикуется до старта воркеров; без базы они прочитают её сами
+    publisher = asyncio.create_task(publish_snapshots(writer, stop))
+    deadline = loop.time() + 10
+    while writer.generation == 0 and not publisher.done() and not stop.is_set() and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+
+    if not stop.is_set():
+        supervisor.start()
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), 0.5)
+            except TimeoutError:
+                supervisor.respawn_dead()
+    finally:
+        logger.info("Stopping workers")
+        await supervisor.stop_workers(supervisor.workers)
+        stop.set()
+        await publisher
+        writer.close()
+        sock.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    workers = SERVE_WORKERS
+    env = {}
+    if workers > 1:
+        # Отзыв токенов и сброс кэшей доходят до других воркеров только через LISTEN/NOTIFY;
+        # с локальным каналом отозванный токен принимали бы остальные воркеры
+        if INVALIDATION_CHANNEL != "postgres":
+            if "postgresql" not in os.getenv("DATABASE_URL", ""):
+                raise SystemExit(f"SERVE_WORKERS={workers} requires a PostgreSQL database for the invalidation "
+                                 f"channel; run a single worker with INVALIDATION_CHANNEL={INVALIDATION_CHANNEL}")
+            if os.getenv("INVALIDATION_CHANNEL") is not None:
+                logger.warning("INVALIDATION_CHANNEL=%s ignored: %s workers use postgres",
+                               INVALIDATION_CHANNEL, workers)
+            env["INVALIDATION_CHANNEL"] = "postgres"
+        if LOGIN_RATE_LIMIT_BACKEND == "memory":
+            logger.warning("LOGIN_RATE_LIMIT_BACKEND=memory: login limits are counted per worker")
+
+    snapshot_dir = tempfile.mkdtemp(prefix="auth-rbac-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    # Воркеры запускаются через spawn и получают окружение супервизора
+    env.update(worker_env(workers, snapshot_dir))
+    os.environ.update(env)
+    sock = bind_socket(SERVE_HOST, SERVE_PORT)
+    logger.info("Listening on %s:%s with %s workers", SERVE_HOST, SERVE_PORT, workers)
+    asyncio.run(supervise(sock, workers, snapshot_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+
+# Модули приложения читают конфигурацию и создают движок при импорте
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.gettempdir()}/auth-tests.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("INVALIDATION_CHANNEL", "local")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("AUDIT_ENABLED", "false")
+# Минимальная стоимость bcrypt, чтобы вход в тестах занимал миллисекунды
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("INTERNAL_KEY", "test-internal-key")
+
+
+async def _create_schema():
+    from database import Base, async_engine, async_session_maker
+    import models  # noqa: F401 — регистрирует все таблицы в Base.metadata
+    from models.permissions import Permission
+    from models.rbac_state import RbacState
+    from models.role_inheritance import RoleInheritance
+    from models.role_permissions import RolePermission
+    from models.roles import Role
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Роли и права как в scripts/seed_data.py; admin наследует client
+    async with async_session_maker() as db:
+        db.add_all([Role(id=1, name="admin"), Role(id=2, name="client"),
+                    Permission(id=1, resource="items", action="read"),
+                    Permission(id=2, resource="items", action="*"),
+                    RbacState(id=1, version=1, user_epoch=0)])
+        await db.flush()
+        db.add_all([RolePermission(role_id=2, permission_id=1), RolePermission(role_id=1, permission_id=2),
+                    RoleInheritance(role_id=1, parent_role_id=2)])
+        await db.commit()
+    await async_engine.dispose()
+
+
+def _reset_process_state():
+    # Кэши и счётчики — глобальные объекты модулей, а база в каждом тесте новая
+    from auth import principal_cache, token_cache
+    from db_depends import read_your_writes
+    from ratelimit import login_limiter
+    from rbac import permission_matrix
+    from revocation import token_denylist
+
+    principal_cache.clear()
+    token_cache._cache.clear()
+    read_your_writes._recent.clear()
+    permission_matrix.version = -1
+    permission_matrix.invalidate()
+    token_denylist._revoked.clear()
+    token_denylist._watermarks.clear()
+    for backend in (login_limiter.backend,):
+        if hasattr(backend, "_buckets"):
+            backend._buckets.clear()
+
+
+@pytest.fixture
+def client():
+    """
+    Приложение с lifespan на чистой SQLite-базе с ролями admin и client.
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+
+    asyncio.run(_create_schema())
+    _reset_process_state()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def create_user(client):
+    """
+    Регистрирует пользователя через API и возвращает его access-токен.
+    """
+    def create(email: str, password: str = "Password123", role_id: int = 2) -> str:
+        response = client.post("/users/", json={"name": email.split("@")[0], "email": email, "role_id": role_id,
+                                                  "password": password, "password_repeat": password})
+        assert response.status_code == 201, response.text
+        response = client.post("/users/token", data={"username": email, "password": password})
+        assert response.status_code == 200, response.text
+        return response.json()["access_token"]
+
+    return create
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
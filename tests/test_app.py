@@ -0,0 +1,22 @@
+from tests.conftest import auth
+
+
+def test_root_and_lifespan_shutdown(client):
+    assert client.get("/").status_code == 200
+
+
+def test_app_restarts_after_shutdown(client):
+    # Второй запуск lifespan в том же процессе: пулы предыдущего закрыты при остановке
+    from main import app
+    from fastapi.testclient import TestClient
+
+    client.__exit__(None, None, None)
+    with TestClient(app) as again:
+        assert again.get("/").status_code == 200
+
+
+def test_signup_login_and_me(client, create_user):
+    token = create_user("user@example.com")
+    response = client.get("/users/me/permissions", headers=auth(token))
+    assert response.status_code == 200
+    assert "items:read" in response.json()["permissions"]
@@ -0,0 +1,60 @@
+import pytest
+from passlib.hash import bcrypt
+
+from auth import configure_bcrypt, pwd_context
+
+
+# Минимальная стоимость, которую допускает bcrypt, чтобы тесты шли быстро
+STORED_ROUNDS = 5
+
+
+@pytest.fixture(autouse=True)
+def restore_context():
+    yield
+    pwd_context.load({"schemes": ["bcrypt"], "deprecated": "auto"})
+
+
+@pytest.fixture(scope="module")
+def stored_hash():
+    return bcrypt.using(rounds=STORED_ROUNDS).hash("password")
+
+
+def rounds_of(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+
+@pytest.mark.parametrize("policy", ["upgrade", "exact", "off"])
+def test_new_hashes_use_configured_rounds(policy):
+    configure_bcrypt(6, policy)
+    assert rounds_of(pwd_context.hash("password")) == 6
+
+
+@pytest.mark.parametrize("rounds, needs_update", [(4, False), (5, False), (6, True)])
+def test_upgrade_rehashes_only_weaker_hashes(stored_hash, rounds, needs_update):
+    configure_bcrypt(rounds, "upgrade")
+    assert pwd_context.needs_update(stored_hash) is needs_update
+
+
+@pytest.mark.parametrize("rounds, needs_update", [(4, True), (5, False), (6, True)])
+def test_exact_rehashes_any_other_cost(stored_hash, rounds, needs_update):
+    configure_bcrypt(rounds, "exact")
+    assert pwd_context.needs_update(stored_hash) is needs_update
+
+
+@pytest.mark.parametrize("rounds", [4, 5, 6])
+def test_off_never_rehashes(stored_hash, rounds):
+    configure_bcrypt(rounds, "off")
+    assert pwd_context.needs_update(stored_hash) is False
+
+
+def test_policy_switch_drops_previous_bounds(stored_hash):
+    configure_bcrypt(6, "exact")
+    configure_bcrypt(4, "off")
+    assert pwd_context.needs_update(stored_hash) is False
+
+
+def test_verify_and_update_returns_new_hash_for_weaker_cost(stored_hash):
+    configure_bcrypt(6, "upgrade")
+    verified, new_hash = pwd_context.verify_and_update("password", stored_hash)
+    assert verified
+    assert rounds_of(new_hash) == 6
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from routers import internal
+
+
+def verify(**headers):
+    asyncio.run(internal.verify_internal_client(headers.get("x_internal_key"), headers.get("authorization")))
+
+
+def test_disabled_without_key(monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_KEY", "")
+    with pytest.raises(HTTPException) as exc:
+        verify(x_internal_key="")
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"x_internal_key": "wrong"},
+    {"authorization": "Bearer wrong"},
+    {"authorization": "Basic secret"},
+])
+def test_rejects_missing_or_wrong_key(monkeypatch, headers):
+    monkeypatch.setattr(internal, "INTERNAL_KEY", "secret")
+    with pytest.raises(HTTPException) as exc:
+        verify(**headers)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.parametrize("headers", [{"x_internal_key": "secret"}, {"authorization": "Bearer secret"}])
+def test_accepts_key(monkeypatch, headers):
+    monkeypatch.setattr(internal, "INTERNAL_KEY", "secret")
+    verify(**headers)
@@ -0,0 +1,33 @@
+import pytest
+
+from routers import introspection
+
+KEY = {"X-Introspection-Key": "gateway-key"}
+
+
+@pytest.fixture(autouse=True)
+def introspection_key(monkeypatch):
+    monkeypatch.setattr(introspection, "INTROSPECTION_KEY", "gateway-key")
+
+
+def test_active_and_inactive_tokens(client, create_user):
+    token = create_user("user@example.com")
+    response = client.post("/oauth/introspect", headers=KEY,
+                           json={"tokens": [token, "garbage"], "checks": ["items:read", "items:write"]})
+    assert response.status_code == 200
+    active, inactive = response.json()["results"]
+    assert active["active"] is True
+    assert active["role"] == "client"
+    assert active["permissions"] == {"items:read": True, "items:write": False}
+    assert inactive == {"active": False}
+
+
+def test_invalid_check_is_422(client, create_user):
+    token = create_user("user@example.com")
+    response = client.post("/oauth/introspect", headers=KEY, json={"tokens": [token], "checks": ["items"]})
+    assert response.status_code == 422
+
+
+def test_requires_key(client):
+    response = client.post("/oauth/introspect", headers={"X-Introspection-Key": "wrong"}, json={"tokens": []})
+    assert response.status_code == 401
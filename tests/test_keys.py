@@ -0,0 +1,64 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from keys import KeyRing
+
+
+def write_key(keys_dir, kid, public_only=False):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    if public_only:
+        data = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        (keys_dir / f"{kid}.pub.pem").write_bytes(data)
+    else:
+        data = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        (keys_dir / f"{kid}.pem").write_bytes(data)
+    return private_key
+
+
+def test_old_token_verifies_after_rotation(tmp_path):
+    old_key = write_key(tmp_path, "k1")
+    old_ring = KeyRing("ES256", keys_dir=str(tmp_path))
+    old_token = old_ring.encode({"sub": "a@example.com"})
+    assert jwt.get_unverified_header(old_token)["kid"] == "k1"
+
+    # Ротация: новый закрытый ключ, старый остаётся только открытым
+    (tmp_path / "k1.pem").unlink()
+    public = old_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    (tmp_path / "k1.pub.pem").write_bytes(public)
+    write_key(tmp_path, "k2")
+    ring = KeyRing("ES256", keys_dir=str(tmp_path), active_kid="k2")
+
+    assert ring.decode(old_token)["sub"] == "a@example.com"
+    new_token = ring.encode({"sub": "b@example.com"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert ring.decode(new_token)["sub"] == "b@example.com"
+    assert {key["kid"] for key in ring.jwks()["keys"]} == {"k1", "k2"}
+
+
+def test_removed_key_is_rejected(tmp_path):
+    write_key(tmp_path, "k1")
+    token = KeyRing("ES256", keys_dir=str(tmp_path)).encode({"sub": "a@example.com"})
+    (tmp_path / "k1.pem").unlink()
+    write_key(tmp_path, "k2")
+    with pytest.raises(jwt.InvalidKeyError):
+        KeyRing("ES256", keys_dir=str(tmp_path)).decode(token)
+
+
+def test_active_kid_must_have_private_key(tmp_path):
+    write_key(tmp_path, "k1")
+    write_key(tmp_path, "k0", public_only=True)
+    with pytest.raises(RuntimeError):
+        KeyRing("ES256", keys_dir=str(tmp_path), active_kid="k0")
+
+
+def test_symmetric_ring_has_no_kid():
+    ring = KeyRing("HS256", secret="secret")
+    token = ring.encode({"sub": "a@example.com"})
+    assert "kid" not in jwt.get_unverified_header(token)
+    assert ring.decode(token)["sub"] == "a@example.com"
+    assert ring.jwks() == {"keys": []}
@@ -0,0 +1,45 @@
+import json
+
+from tests.conftest import auth
+
+
+def test_keyset_cursor_walks_all_users_once(client, create_user):
+    admin = create_user("admin@example.com", role_id=1)
+    for i in range(6):
+        create_user(f"user{i}@example.com")
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor is not None else {})}
+        page = client.get("/admin/users", params=params, headers=auth(admin)).json()
+        pages += 1
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        assert cursor == ids[-1]
+
+    assert pages == 3
+    assert ids == sorted(set(ids)) and len(ids) == 7
+
+
+def test_last_full_page_has_no_next_cursor(client, create_user):
+    admin = create_user("admin@example.com", role_id=1)
+    create_user("other@example.com")
+    page = client.get("/admin/users", params={"limit": 2}, headers=auth(admin)).json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"] is None
+
+
+def test_filters_and_ndjson_export(client, create_user):
+    admin = create_user("admin@example.com", role_id=1)
+    create_user("a@example.com")
+    create_user("b@example.com")
+
+    page = client.get("/admin/users", params={"role_id": 2}, headers=auth(admin)).json()
+    assert [item["email"] for item in page["items"]] == ["a@example.com", "b@example.com"]
+
+    response = client.get("/admin/users", params={"format": "ndjson"}, headers=auth(admin))
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == ["admin@example.com", "a@example.com", "b@example.com"]
@@ -0,0 +1,60 @@
+from tests.conftest import auth
+
+
+def test_matching_if_none_match_returns_304(client, create_user):
+    token = create_user("etag@example.com")
+    response = client.get("/users/me/permissions", headers=auth(token))
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/users/me/permissions", headers={**auth(token), "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    weak = client.get("/users/me/permissions", headers={**auth(token), "If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+
+def test_etag_changes_with_rbac_version(client, create_user):
+    token = create_user("client@example.com")
+    admin = create_user("admin@example.com", role_id=1)
+    etag = client.get("/users/me/permissions", headers=auth(token)).headers["etag"]
+
+    assert client.post("/admin/roles", params={"name": "auditor"}, headers=auth(admin)).status_code == 200
+    response = client.get("/users/me/permissions", headers={**auth(token), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_check_permission_uses_inherited_and_wildcard_grants(client, create_user):
+    user = create_user("reader@example.com")
+    admin = create_user("boss@example.com", role_id=1)
+    assert client.get("/mock/items", headers=auth(user)).status_code == 200
+    assert client.post("/mock/items", json={"name": "X"}, headers=auth(user)).status_code == 403
+    # admin: items:* напрямую и items:read через наследование от client
+    assert client.get("/mock/items", headers=auth(admin)).status_code == 200
+    assert client.post("/mock/items", json={"name": "X"}, headers=auth(admin)).status_code == 200
+
+
+def test_check_permissions_modes():
+    import asyncio
+
+    import pytest
+    from fastapi import HTTPException
+    from starlette.requests import Request
+
+    from auth import Principal, check_permissions
+
+    principal = Principal(id=1, role_id=2, role_name="client", is_active=True,
+                          permissions=frozenset({("items", "read")}))
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "client": None,
+                       "query_string": b"", "server": ("test", 80), "scheme": "http", "root_path": ""})
+    pairs = ["items:read", "items:create"]
+
+    verdicts = asyncio.run(check_permissions(pairs, mode="any")(request, principal))
+    assert verdicts == {"items:read": True, "items:create": False}
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(check_permissions(pairs, mode="all")(request, principal))
+    assert exc.value.status_code == 403
+    assert "items:create" in exc.value.detail
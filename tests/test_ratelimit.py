@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import ratelimit
+from ratelimit import MemoryBackend, PostgresBackend, parse_rate
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def hit(backend, key="email:a", limit=5, period=60.0) -> float:
+    return asyncio.run(backend.hit(key, limit, period))
+
+
+def test_parse_rate():
+    assert parse_rate("5/60") == (5, 60.0)
+    assert parse_rate("10") == (10, 60.0)
+
+
+def test_token_bucket_allows_burst_then_reports_retry_after(clock):
+    backend = MemoryBackend(max_keys=100)
+    assert [hit(backend) for _ in range(5)] == [0.0] * 5
+    # Один токен восстанавливается за period / limit = 12 секунд
+    assert hit(backend) == pytest.approx(12.0)
+    clock.now += 6
+    assert hit(backend) == pytest.approx(6.0)
+    clock.now += 6
+    assert hit(backend) == 0.0
+
+
+def test_token_bucket_keys_are_independent(clock):
+    backend = MemoryBackend(max_keys=100)
+    for _ in range(5):
+        hit(backend, key="email:a")
+    assert hit(backend, key="email:a") > 0
+    assert hit(backend, key="email:b") == 0.0
+
+
+def test_idle_buckets_are_evicted(clock):
+    backend = MemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        hit(backend, key=key)
+    assert backend.stats()["keys"] == 2
+    clock.now += 61
+    hit(backend, key="d")
+    assert backend.stats()["keys"] == 1
+
+
+def test_postgres_backend_counts_a_fixed_window(client):
+    backend = PostgresBackend()
+
+    async def scenario():
+        return [await backend.hit("email:x", 3, 3600) for _ in range(4)]
+
+    retry = client.portal.call(scenario)
+    assert retry[:3] == [0.0, 0.0, 0.0]
+    assert 0 < retry[3] <= 3600
+
+
+def test_login_is_throttled_with_retry_after(client, create_user):
+    create_user("victim@example.com")
+    # create_user уже потратил одну попытку входа из пяти
+    for _ in range(4):
+        response = client.post("/users/token", data={"username": "victim@example.com", "password": "wrong-pass"})
+        assert response.status_code == 401
+    response = client.post("/users/token", data={"username": "victim@example.com", "password": "Password123"})
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 12
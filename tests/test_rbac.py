@@ -0,0 +1,41 @@
+from rbac import expand_inheritance, grants_match
+
+
+def test_exact_grant():
+    grants = frozenset({("items", "read")})
+    assert grants_match(grants, "items", "read")
+    assert not grants_match(grants, "items", "write")
+    assert not grants_match(grants, "orders", "read")
+
+
+def test_resource_wildcard():
+    grants = frozenset({("items", "*")})
+    assert grants_match(grants, "items", "read")
+    assert grants_match(grants, "items", "delete")
+    assert not grants_match(grants, "orders", "read")
+
+
+def test_action_wildcard():
+    grants = frozenset({("*", "read")})
+    assert grants_match(grants, "items", "read")
+    assert grants_match(grants, "orders", "read")
+    assert not grants_match(grants, "items", "write")
+
+
+def test_full_wildcard():
+    grants = frozenset({("*", "*")})
+    assert grants_match(grants, "anything", "everything")
+    assert not grants_match(frozenset(), "items", "read")
+
+
+def test_inheritance_is_transitive():
+    parents = {1: {2}, 2: {3}}
+    closure = expand_inheritance([1, 2, 3], parents)
+    assert closure == {1: frozenset({1, 2, 3}), 2: frozenset({2, 3}), 3: frozenset({3})}
+
+
+def test_inheritance_cycle_terminates():
+    parents = {1: {2}, 2: {3}, 3: {1}, 4: {4}}
+    closure = expand_inheritance([1, 2, 3, 4], parents)
+    assert closure[1] == closure[2] == closure[3] == frozenset({1, 2, 3})
+    assert closure[4] == frozenset({4})
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from rbac_snapshot import SnapshotReader, SnapshotWriter, data_file, decode_snapshot, encode_snapshot
+
+ROLE_NAMES = {1: "admin", 2: "client", 3: "гость"}
+DIRECT = {1: {("items", "*")}, 2: {("items", "read"), ("orders", "read")}, 3: set()}
+PARENTS = {1: {2}, 2: {3}}
+
+
+def test_round_trip():
+    data = encode_snapshot(7, 3, ROLE_NAMES, DIRECT, PARENTS)
+    assert decode_snapshot(data) == (7, 3, ROLE_NAMES, DIRECT, PARENTS)
+
+
+def test_empty_snapshot():
+    assert decode_snapshot(encode_snapshot(0, 0, {}, {}, {})) == (0, 0, {}, {}, {})
+
+
+def test_bad_magic_is_rejected():
+    data = bytearray(encode_snapshot(1, 0, ROLE_NAMES, DIRECT, PARENTS))
+    data[:4] = b"XXXX"
+    with pytest.raises(ValueError):
+        decode_snapshot(bytes(data))
+
+
+def test_reader_follows_generations(tmp_path):
+    directory = str(tmp_path / "snapshots")
+    writer = SnapshotWriter(directory, keep=2)
+    reader = SnapshotReader(directory)
+    try:
+        assert reader.generation() is None
+
+        first = writer.publish(encode_snapshot(1, 0, ROLE_NAMES, DIRECT, PARENTS))
+        assert reader.generation() == first == 1
+        assert reader.load(first)[0] == 1
+
+        second = writer.publish(encode_snapshot(2, 1, {1: "admin"}, {1: {("*", "*")}}, {}))
+        assert reader.generation() == second == 2
+        assert reader.load(second) == (2, 1, {1: "admin"}, {1: {("*", "*")}}, {})
+
+        # Старше keep поколений файлы удаляются, читатель получает None
+        writer.publish(encode_snapshot(3, 1, {}, {}, {}))
+        assert not os.path.exists(data_file(directory, first))
+        assert reader.load(first) is None
+        assert reader.load(reader.generation())[0] == 3
+    finally:
+        writer.close()
+    assert not os.path.exists(directory)
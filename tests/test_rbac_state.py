@@ -0,0 +1,47 @@
+import asyncio
+
+from sqlalchemy import delete
+
+from database import async_engine, async_session_maker
+from models.rbac_state import RbacState
+from rbac import bump_rbac_version, bump_user_epoch, get_rbac_state
+
+
+async def reset_state():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(RbacState.__table__.create, checkfirst=True)
+        await conn.execute(delete(RbacState))
+
+
+async def bump(func):
+    async with async_session_maker() as db:
+        await func(db)
+        await db.commit()
+
+
+async def state():
+    async with async_session_maker() as db:
+        return await get_rbac_state(db)
+
+
+def test_bumps_create_the_missing_row_and_increment_it():
+    async def scenario():
+        await reset_state()
+        await bump(bump_rbac_version)
+        assert await state() == (1, 0)
+        await bump(bump_user_epoch)
+        await bump(bump_rbac_version)
+        assert await state() == (2, 1)
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_bumps_on_missing_row_do_not_conflict():
+    async def scenario():
+        await reset_state()
+        await asyncio.gather(*(bump(bump_rbac_version) for _ in range(5)))
+        assert await state() == (5, 0)
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import db_depends
+from db_depends import ReadYourWrites, get_async_db, get_read_db
+
+
+WINDOW = 0.3
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """
+    Две отдельные SQLite-базы: основная и "реплика", которая не видит новых записей.
+    """
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+
+    async def prepare():
+        for engine in (primary, replica):
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE notes (body TEXT)"))
+
+    asyncio.run(prepare())
+    monkeypatch.setattr(db_depends, "LazySession", _lazy_factory(primary))
+    monkeypatch.setattr(db_depends, "read_session_maker", async_sessionmaker(replica, class_=AsyncSession))
+    monkeypatch.setattr(db_depends, "replica_engine", replica)
+    monkeypatch.setattr(db_depends, "read_your_writes", ReadYourWrites(window=WINDOW, max_users=100))
+    yield
+    asyncio.run(_dispose(primary, replica))
+
+
+async def _dispose(*engines):
+    for engine in engines:
+        await engine.dispose()
+
+
+def _lazy_factory(primary):
+    original = db_depends.LazySession
+    primary_maker = async_sessionmaker(primary, class_=AsyncSession)
+
+    class LazySession(original):
+        __slots__ = ()
+
+        def __init__(self, maker=None):
+            # Сессия по умолчанию — основная база теста, а не движок приложения
+            super().__init__(maker or primary_maker)
+
+    return LazySession
+
+
+@pytest.fixture
+def client(databases):
+    app = FastAPI()
+
+    @app.post("/notes")
+    async def write(body: str, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("INSERT INTO notes (body) VALUES (:body)"), {"body": body})
+        await db.commit()
+        await db_depends.read_your_writes.mark(1)
+        return {}
+
+    @app.get("/notes")
+    async def read(db: AsyncSession = Depends(get_read_db)):
+        return (await db.execute(text("SELECT body FROM notes"))).scalars().all()
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def bearer(sub: int) -> dict:
+    # Для выбора базы подпись не проверяется, нужен только sub
+    return {"Authorization": f"Bearer {jwt.encode({'sub': str(sub)}, 'any-key', algorithm='HS256')}"}
+
+
+def test_reads_go_to_replica(client):
+    stats = db_depends.session_stats.stats()
+    assert client.get("/notes", headers=bearer(1)).json() == []
+    assert db_depends.session_stats.replica_reads == stats["replica_reads"] + 1
+
+
+def test_writer_reads_own_write_from_primary_until_window_expires(client):
+    client.post("/notes", params={"body": "hello"}, headers=bearer(1))
+    # Сразу после записи пользователь читает с основной базы и видит свою запись
+    assert client.get("/notes", headers=bearer(1)).json() == ["hello"]
+    # Другой пользователь продолжает читать с реплики
+    assert client.get("/notes", headers=bearer(2)).json() == []
+    assert client.get("/notes").json() == []
+    time.sleep(WINDOW + 0.1)
+    assert client.get("/notes", headers=bearer(1)).json() == []
+
+
+def test_read_your_writes_entry_expires():
+    tracker = ReadYourWrites(window=0.05, max_users=10)
+    asyncio.run(tracker.mark(7))
+    assert tracker.is_recent(7)
+    time.sleep(0.1)
+    assert not tracker.is_recent(7)
+
+
+def test_without_replica_reads_share_the_primary_session(client, monkeypatch):
+    monkeypatch.setattr(db_depends, "replica_engine", None)
+    client.post("/notes", params={"body": "hello"}, headers=bearer(1))
+    time.sleep(WINDOW + 0.1)
+    primary_reads = db_depends.session_stats.primary_reads
+    assert client.get("/notes", headers=bearer(2)).json() == ["hello"]
+    assert db_depends.session_stats.primary_reads == primary_reads + 1
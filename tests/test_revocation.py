@@ -0,0 +1,128 @@
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+
+from revocation import BloomFilter, TokenDenylist
+
+
+def make_denylist(**kwargs) -> TokenDenylist:
+    return TokenDenylist(capacity=1000, error_rate=0.01, max_token_lifetime=timedelta(days=7), **kwargs)
+
+
+def payload(jti: str, sub: int = 1, iat: int | None = None) -> dict:
+    return {"sub": str(sub), "jti": jti, "iat": iat or int(time.time())}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    items = [uuid.uuid4().hex for _ in range(5000)]
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter.build([uuid.uuid4().hex for _ in range(5000)], capacity=5000, error_rate=0.01)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20000))
+    assert false_positives / 20000 < 0.03
+
+
+def test_bloom_filter_build_grows_past_capacity():
+    items = [str(i) for i in range(300)]
+    bloom = BloomFilter.build(items, capacity=100, error_rate=0.01)
+    assert bloom.capacity == 300
+    assert all(item in bloom for item in items)
+
+
+def test_purge_keeps_live_entries_and_drops_expired():
+    denylist = make_denylist()
+    now = int(time.time())
+    denylist._add_jti("live", now + 600)
+    denylist._add_jti("expiring", now + 600)
+    denylist._revoked["expiring"] = now - 1
+    denylist._set_watermark(1, now)
+    denylist._set_watermark(2, now - int(timedelta(days=8).total_seconds()))
+
+    denylist.purge()
+
+    assert denylist.is_revoked(payload("live", sub=3))
+    assert not denylist.is_revoked(payload("expiring", sub=3))
+    assert denylist.is_revoked(payload("other", sub=1, iat=now - 10))
+    assert 2 not in denylist._watermarks
+
+
+def test_purge_requests_rebuild_only_past_ratio():
+    denylist = make_denylist(rebuild_ratio=0.5)
+    now = int(time.time())
+    for i in range(10):
+        denylist._add_jti(f"jti-{i}", now + 600)
+    for i in range(4):
+        denylist._revoked[f"jti-{i}"] = now - 1
+    assert denylist.purge() is False
+    denylist._revoked["jti-4"] = now - 1
+    assert denylist.purge() is True
+
+
+def test_rebuild_keeps_live_entries_and_entries_added_meanwhile():
+    denylist = make_denylist()
+    now = int(time.time())
+    for i in range(10):
+        denylist._add_jti(f"jti-{i}", now + 600)
+    for i in range(0, 10, 2):
+        denylist._revoked[f"jti-{i}"] = now - 1
+    assert denylist.purge()
+
+    built_from = list(denylist._revoked)
+    bloom = BloomFilter.build(built_from, denylist.capacity, denylist.error_rate)
+    denylist._add_jti("late", now + 600)
+    denylist._swap_bloom(bloom, built_from)
+
+    assert denylist.bloom_rebuilds == 1
+    assert denylist._bloom_items == 6
+    for jti in [*built_from, "late"]:
+        assert denylist.is_revoked(payload(jti, sub=2))
+
+
+def test_duplicate_revocation_is_counted_once():
+    denylist = make_denylist()
+    denylist._on_message(f"jti:abc:{int(time.time()) + 600}")
+    denylist._on_message(f"jti:abc:{int(time.time()) + 600}")
+    assert denylist._bloom_items == 1
+
+
+def test_rebuild_bloom_runs_off_loop():
+    denylist = make_denylist()
+    denylist._add_jti("live", int(time.time()) + 600)
+    asyncio.run(denylist.rebuild_bloom())
+    assert denylist.is_revoked(payload("live"))
+
+
+def test_revoking_the_same_jti_twice_does_not_conflict(client):
+    from sqlalchemy import func, select
+
+    from database import async_session_maker
+    from models.revoked_tokens import RevokedToken
+
+    token = {"sub": "1", "jti": "same-jti", "exp": int(time.time()) + 600}
+
+    async def revoke_from(denylist: TokenDenylist):
+        async with async_session_maker() as db:
+            await denylist.revoke(db, token)
+
+    async def scenario():
+        # Два воркера, которые ещё не знают об отзыве друг друга
+        await asyncio.gather(revoke_from(make_denylist()), revoke_from(make_denylist()))
+        await revoke_from(make_denylist())
+        async with async_session_maker() as db:
+            return await db.scalar(select(func.count()).select_from(RevokedToken))
+
+    assert client.portal.call(scenario) == 1
+
+
+def test_logout_revokes_the_token(client, create_user):
+    from tests.conftest import auth
+
+    token = create_user("logout@example.com")
+    assert client.post("/users/logout", headers=auth(token)).status_code == 200
+    assert client.get("/users/me/permissions", headers=auth(token)).status_code == 401
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+import serve
+from serve import Supervisor, Worker
+
+
+class FakeProcess:
+    def __init__(self, alive: bool = True):
+        self.alive = alive
+        self.pid = id(self)
+        self.exitcode = None if alive else 1
+        self.terminated = False
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self):
+        self.terminated = True
+        self.alive = False
+
+    def kill(self):
+        self.alive = False
+
+    def join(self):
+        pass
+
+
+def make_worker(ready: bool = True, alive: bool = True) -> Worker:
+    event = threading.Event()
+    if ready:
+        event.set()
+    return Worker(FakeProcess(alive), event)
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    monkeypatch.setattr(serve, "SERVE_GRACEFUL_TIMEOUT", 0.3)
+    supervisor = Supervisor(sock=None, workers=2)
+    supervisor.workers = [make_worker(), make_worker()]
+    return supervisor
+
+
+def test_reload_swaps_generations_when_new_workers_are_ready(supervisor):
+    old = supervisor.workers
+    supervisor.spawn = lambda: make_worker()
+    asyncio.run(supervisor.reload())
+    assert supervisor.workers is not old
+    assert all(w.process.terminated for w in old)
+
+
+@pytest.mark.parametrize("new_worker", [
+    {"ready": False, "alive": False},   # упал при импорте или в lifespan
+    {"ready": False, "alive": True},    # не стартовал до таймаута
+])
+def test_reload_keeps_old_workers_when_new_ones_fail(supervisor, new_worker):
+    old = list(supervisor.workers)
+    spawned = []
+
+    def spawn():
+        worker = make_worker(**new_worker) if not spawned else make_worker()
+        spawned.append(worker)
+        return worker
+
+    supervisor.spawn = spawn
+    asyncio.run(supervisor.reload())
+    assert supervisor.workers == old
+    assert not any(w.process.terminated for w in old)
+    assert not any(w.process.is_alive() for w in spawned)
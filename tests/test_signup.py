@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def signup(client, email: str):
+    return client.post("/users/", json={"name": "Racer", "email": email, "role_id": 2,
+                                        "password": "Password123", "password_repeat": "Password123"})
+
+
+def test_concurrent_signups_with_one_email_get_201_and_409(client):
+    # Запросы из нескольких потоков выполняются конкурентно в event loop приложения
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = sorted(r.status_code for r in pool.map(lambda _: signup(client, "race@example.com"), range(4)))
+    assert statuses == [201, 409, 409, 409]
+
+
+def test_duplicate_signup_is_409(client):
+    assert signup(client, "dup@example.com").status_code == 201
+    response = signup(client, "dup@example.com")
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Email already registered"}
+
+
+def test_unknown_role_is_400(client):
+    response = client.post("/users/", json={"name": "X", "email": "x@example.com", "role_id": 99,
+                                            "password": "Password123", "password_repeat": "Password123"})
+    assert response.status_code == 400
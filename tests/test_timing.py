@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import timing
+from timing import TimingMiddleware, phase
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(timing, "SERVER_TIMING_ENABLED", True)
+    monkeypatch.setattr(timing, "METRICS_ENABLED", True)
+    monkeypatch.setattr(timing, "request_duration", timing.Histogram("request", "", ("method", "route", "status")))
+    monkeypatch.setattr(timing, "phase_duration", timing.Histogram("phase", "", ("route", "phase")))
+
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with phase("db"):
+            await asyncio.sleep(0.001)
+        return {"id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_server_timing_header_lists_phases(client):
+    response = client.get("/items/1")
+    assert response.status_code == 200
+    names = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+    assert names == ["db", "other", "total"]
+
+
+def test_histograms_are_labelled_by_route_template(client):
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+    series = timing.request_duration._series
+    assert series[("GET", "/items/{item_id}", "200")][2] == 2
+    assert series[("GET", "unmatched", "404")][2] == 1
+    assert ("/items/{item_id}", "db") in timing.phase_duration._series
+
+
+def test_unhandled_error_is_recorded_as_500(client):
+    assert client.get("/boom").status_code == 500
+    assert timing.request_duration._series[("GET", "/boom", "500")][2] == 1
@@ -0,0 +1,198 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from config import METRICS_ENABLED, SERVER_TIMING_ENABLED
+
+
+TIMING_ENABLED = METRICS_ENABLED or SERVER_TIMING_ENABLED
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Фазы текущего запроса: имя -> [суммарное время, число замеров]
+_phases: ContextVar[dict[str, list] | None] = ContextVar("timing_phases", default=None)
+
+
+class _Phase:
+    __slots__ = ("_phases", "_name", "_started")
+
+    def __init__(self, phases: dict, name: str):
+        self._phases = phases
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self._name, time.perf_counter() - self._started, self._phases)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        self.__exit__(*exc)
+
+
+class _NoopPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+_NOOP = _NoopPhase()
+
+
+def phase(name: str):
+    """
+    Замер фазы запроса: with phase("jwt"): ...
+    Вне запроса или при выключенных метриках ничего не делает.
+    """
+    phases = _phases.get()
+    if phases is None:
+        return _NOOP
+    return _Phase(phases, name)
+
+
+def record(name: str, seconds: float, phases: dict | None = None):
+    """
+    Добавляет длительность фазы к текущему запросу.
+    """
+    if phases is None:
+        phases = _phases.get()
+        if phases is None:
+            return
+    entry = phases.get(name)
+    if entry is None:
+        phases[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus с фиксированными границами и набором меток.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # Счётчики по корзинам, затем сумма и общее число
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_duration = Histogram(
+    "auth_request_duration_seconds", "HTTP request latency", ("method", "route", "status"),
+)
+phase_duration = Histogram(
+    "auth_phase_duration_seconds", "Time spent per request phase", ("route", "phase"),
+)
+
+
+class TimingMiddleware:
+    """
+    Собирает фазы запроса, добавляет заголовок Server-Timing и наполняет гистограммы.
+    Чистый ASGI: обработчик выполняется в той же задаче, без обёртки тела ответа,
+    а длительность фиксируется в момент отправки заголовков.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: dict[str, list] = {}
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total = self._finish(scope, phases, started, status_code)
+                if SERVER_TIMING_ENABLED:
+                    message["headers"] = [*message.get("headers", ()),
+                                          (b"server-timing", _server_timing(phases, total).encode("latin-1"))]
+            await send(message)
+
+        token = _phases.set(phases)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            # Необработанная ошибка: ответ 500 отправит ServerErrorMiddleware снаружи
+            if status_code is None:
+                self._finish(scope, phases, started, 500)
+            raise
+        finally:
+            _phases.reset(token)
+
+    @staticmethod
+    def _finish(scope, phases: dict, started: float, status_code: int) -> float:
+        total = time.perf_counter() - started
+        accounted = sum(seconds for seconds, _ in phases.values())
+        phases["other"] = [max(0.0, total - accounted), 1]
+        if METRICS_ENABLED:
+            route_path = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe((scope["method"], route_path, str(status_code)), total)
+            for name, (seconds, _) in phases.items():
+                phase_duration.observe((route_path, name), seconds)
+        return total
+
+
+def _server_timing(phases: dict, total: float) -> str:
+    metrics = [
+        f'{name};dur={seconds * 1000:.3f}' + (f';desc="x{count}"' if count > 1 else "")
+        for name, (seconds, count) in phases.items()
+    ]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics)
+
+
+def render_metrics(gauges: dict[str, float] | None = None) -> str:
+    """
+    Метрики в текстовом формате Prometheus.
+    """
+    lines = request_duration.render() + phase_duration.render()
+    for name, value in (gauges or {}).items():
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+
+from pydantic import EmailStr, TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload
+
+from auth import create_access_token, decode_token, hash_password_async, verify_password_async
+from config import WARMUP_ENABLED, WARMUP_POOL_CONNECTIONS
+from database import async_engine, async_session_maker, replica_engine
+from models.users import User as UserModel
+from rbac import permission_matrix
+
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """
+    Состояние прогрева для эндпоинта готовности.
+    """
+
+    def __init__(self):
+        self.ready = not WARMUP_ENABLED
+        self.attempts = 0
+        self.duration_ms: float | None = None
+        self.steps: dict[str, float] = {}
+        self.error: str | None = None
+
+
+warmup_state = WarmupState()
+
+
+async def _open_pool_connections(count: int):
+    # Соединения открываются одновременно и возвращаются в пул уже установленными
+    async def touch(engine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = [async_engine] + ([replica_engine] if replica_engine is not None else [])
+    await asyncio.gather(*(touch(engine) for engine in engines for _ in range(count)))
+
+
+async def _warm_queries():
+    # Выполнение типовых запросов заполняет кэш компиляции SQLAlchemy
+    # и кэш подготовленных выражений драйвера
+    async with async_session_maker() as db:
+        await permission_matrix.ensure_fresh(db)
+        await db.execute(
+            select(UserModel).options(joinedload(UserModel.role))
+            .where(UserModel.id == -1)
+        )
+        await db.scalars(select(UserModel).where(UserModel.email == "", UserModel.is_active.is_(True)))
+
+
+async def _warm_crypto():
+    hashed = await hash_password_async("warmup-password")
+    await verify_password_async("warmup-password", hashed)
+    decode_token(create_access_token({"sub": "0"}))
+    TypeAdapter(EmailStr).validate_python("warmup@example.com")
+
+
+async def warmup():
+    """
+    Прогревает пул соединений, снимок RBAC, кэши запросов, bcrypt, JWT и email-validator.
+    При ошибке повторяет попытку с нарастающей паузой; готовность выставляется после успеха.
+    """
+    if not WARMUP_ENABLED:
+        return
+    delay = 1.0
+    while True:
+        warmup_state.attempts += 1
+        started = time.perf_counter()
+        try:
+            for name, step in (
+                ("pool", lambda: _open_pool_connections(WARMUP_POOL_CONNECTIONS)),
+                ("queries", _warm_queries),
+                ("crypto", _warm_crypto),
+            ):
+                step_started = time.perf_counter()
+                await step()
+                warmup_state.steps[name] = round((time.perf_counter() - step_started) * 1000, 3)
+        except Exception as exc:
+            warmup_state.error = repr(exc)
+            logger.warning("Warmup attempt %s failed: %r", warmup_state.attempts, exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            continue
+        warmup_state.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        warmup_state.error = None
+        warmup_state.ready = True
+        return